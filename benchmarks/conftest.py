@@ -0,0 +1,9 @@
+from tests.conftest import (  # noqa: F401
+    clear_caches,
+    client,
+    jobs,
+    session,
+    task,
+    token,
+    user,
+)
@@ -0,0 +1,289 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+from http import HTTPStatus
+from pathlib import Path
+from statistics import quantiles
+from time import perf_counter
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from curso_fastapi.app import app
+from curso_fastapi.database import get_session
+from curso_fastapi.models import table_registry
+from curso_fastapi.ratelimit import rate_limiter
+from curso_fastapi.replicas import get_read_session
+from tests.factories import TaskFactory, UserFactory
+
+DEFAULT_BASELINE = Path(__file__).parent / 'baselines' / 'load.json'
+TASK_FIELDS = ('title', 'description', 'state')
+
+
+def percentiles(latencies):
+    cuts = quantiles(latencies, n=100, method='inclusive')
+    return {'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98]}
+
+
+async def seed(client, users, tasks_per_user):
+    accounts = []
+    for _ in range(users):
+        user = UserFactory.build()
+        response = await client.post(
+            '/users/',
+            json={
+                'username': user.username,
+                'email': user.email,
+                'password': user.password,
+            },
+        )
+        response.raise_for_status()
+        user_id = response.json()['id']
+
+        response = await client.post(
+            '/auth/token/',
+            data={'username': user.username, 'password': user.password},
+        )
+        response.raise_for_status()
+        headers = {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+        response = await client.post(
+            '/tasks/bulk',
+            json={
+                'tasks': [
+                    {field: getattr(task, field) for field in TASK_FIELDS}
+                    for task in TaskFactory.build_batch(tasks_per_user)
+                ]
+            },
+            headers=headers,
+        )
+        response.raise_for_status()
+        task_ids = [result['id'] for result in response.json()['results']]
+        accounts.append({'id': user_id, 'headers': headers, 'task_ids': task_ids})
+    return accounts
+
+
+def scenarios(accounts):
+    def pick():
+        return random.choice(accounts)
+
+    def list_tasks():
+        account = pick()
+        return 'GET', '/tasks/', {'headers': account['headers']}
+
+    def get_task():
+        account = pick()
+        task_id = random.choice(account['task_ids'])
+        return 'GET', f'/tasks/{task_id}', {'headers': account['headers']}
+
+    def get_user():
+        return 'GET', f'/users/{pick()["id"]}', {}
+
+    def create_task():
+        account = pick()
+        task = TaskFactory.build()
+        return (
+            'POST',
+            '/tasks/',
+            {
+                'headers': account['headers'],
+                'json': {field: getattr(task, field) for field in TASK_FIELDS},
+            },
+        )
+
+    def update_task():
+        account = pick()
+        task_id = random.choice(account['task_ids'])
+        return (
+            'PATCH',
+            f'/tasks/{task_id}',
+            {'headers': account['headers'], 'json': {'state': 'doing'}},
+        )
+
+    return {
+        'GET /tasks/': list_tasks,
+        'GET /tasks/{task_id}': get_task,
+        'GET /users/{user_id}': get_user,
+        'POST /tasks/': create_task,
+        'PATCH /tasks/{task_id}': update_task,
+    }
+
+
+async def run_scenario(client, build_request, requests, concurrency):
+    latencies = []
+    errors = 0
+    rate_limited = 0
+    pending = iter(range(requests))
+
+    async def worker():
+        nonlocal errors, rate_limited
+        for _ in pending:
+            method, url, kwargs = build_request()
+            started_at = perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(perf_counter() - started_at)
+            if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+                rate_limited += 1
+            if response.is_error:
+                errors += 1
+
+    started_at = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = perf_counter() - started_at
+
+    return {
+        **percentiles(latencies),
+        'rps': requests / elapsed,
+        'errors': errors,
+        'rate_limited': rate_limited,
+    }
+
+
+def in_process_client(database_url):
+    engine = create_async_engine(database_url, connect_args={'timeout': 30})
+
+    @event.listens_for(engine.sync_engine, 'connect')
+    def enable_wal(dbapi_connection, connection_record):
+        dbapi_connection.execute('PRAGMA journal_mode=WAL')
+
+    async def get_session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(table_registry.metadata.create_all)
+
+    app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_read_session] = get_session_override
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app, raise_app_exceptions=False),
+        base_url='http://loadtest',
+    )
+    return client, create_tables, engine
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for endpoint, result in results.items():
+        expected = baseline.get(endpoint)
+        if expected is None:
+            continue
+        if result['p95'] > expected['p95'] * (1 + tolerance):
+            regressions.append(
+                f'{endpoint}: p95 {result["p95"] * 1000:.1f}ms '
+                f'(baseline {expected["p95"] * 1000:.1f}ms)'
+            )
+        if result['rps'] < expected['rps'] * (1 - tolerance):
+            regressions.append(
+                f'{endpoint}: {result["rps"]:.0f} req/s '
+                f'(baseline {expected["rps"]:.0f} req/s)'
+            )
+    return regressions
+
+
+def report(results):
+    print(
+        f'{"endpoint":<26}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}'
+        f'{"req/s":>10}{"errors":>8}'
+    )
+    for endpoint, result in results.items():
+        print(
+            f'{endpoint:<26}'
+            f'{result["p50"] * 1000:>10.2f}'
+            f'{result["p95"] * 1000:>10.2f}'
+            f'{result["p99"] * 1000:>10.2f}'
+            f'{result["rps"]:>10.0f}'
+            f'{result["errors"]:>8}'
+        )
+
+
+async def main(args):
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url)
+        engine = None
+    else:
+        rate_limiter.enabled = args.rate_limit
+        directory = tempfile.mkdtemp()
+        client, create_tables, engine = in_process_client(
+            f'sqlite+aiosqlite:///{directory}/load.db'
+        )
+        await create_tables()
+
+    async with client:
+        accounts = await seed(client, args.users, args.tasks)
+        results = {}
+        for endpoint, build_request in scenarios(accounts).items():
+            if args.endpoint and endpoint not in args.endpoint:
+                continue
+            results[endpoint] = await run_scenario(
+                client, build_request, args.requests, args.concurrency
+            )
+
+    if engine is not None:
+        await engine.dispose()
+        app.dependency_overrides.clear()
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Load test the API and report latency percentiles and RPS.'
+    )
+    parser.add_argument(
+        '--url', help='Base URL of a running server (default: in-process app)'
+    )
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--tasks', type=int, default=100, help='Tasks per user')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument(
+        '--endpoint', action='append', help='Only run the given endpoint(s)'
+    )
+    parser.add_argument(
+        '--rate-limit',
+        action='store_true',
+        help='Keep the rate limiter enabled for the in-process app',
+    )
+    parser.add_argument('--save', type=Path, nargs='?', const=DEFAULT_BASELINE)
+    parser.add_argument('--compare', type=Path, nargs='?', const=DEFAULT_BASELINE)
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.2,
+        help='Allowed relative regression against the baseline',
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.compare and not args.compare.exists():
+        sys.exit(
+            f'No baseline at {args.compare}; record one on this machine with --save'
+        )
+
+    results = asyncio.run(main(args))
+    report(results)
+    if any(result['rate_limited'] for result in results.values()):
+        print(
+            'Some requests were rate limited; start the server with '
+            'RATE_LIMIT_ENABLED=false to measure the endpoints themselves',
+            file=sys.stderr,
+        )
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(results, indent=2) + '\n')
+
+    if args.compare:
+        regressions = compare(
+            results, json.loads(args.compare.read_text()), args.tolerance
+        )
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        sys.exit(1 if regressions else 0)
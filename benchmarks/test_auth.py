@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+from curso_fastapi.security import (
+    create_access_token,
+    decode_token,
+    get_current_user,
+    token_cache,
+    user_cache,
+)
+
+
+@pytest.fixture(params=[False, True], ids=['verify-every-request', 'token-cache'])
+def token_cache_enabled(request, monkeypatch):
+    if not request.param:
+        monkeypatch.setattr(token_cache, 'maxsize', 0)
+    return request.param
+
+
+def test_create_access_token(benchmark):
+    benchmark(create_access_token, {'sub': 'test@test.com'})
+
+
+def test_decode_token(benchmark, token, token_cache_enabled):
+    benchmark(decode_token, token)
+
+
+def test_list_tasks_auth_overhead(benchmark, client, token, token_cache_enabled):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    benchmark(client.get, '/tasks/', headers=headers)
+
+
+@pytest.mark.parametrize('user_cache_enabled', [False, True], ids=['db', 'user-cache'])
+def test_get_current_user(benchmark, session, token, user_cache_enabled, monkeypatch):
+    if not user_cache_enabled:
+        monkeypatch.setattr(user_cache, 'maxsize', 0)
+    loop = asyncio.get_event_loop()
+
+    benchmark(lambda: loop.run_until_complete(get_current_user(session, token)))
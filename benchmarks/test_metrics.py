@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+from curso_fastapi.metrics import MetricsMiddleware, http_request_duration_seconds
+
+SCOPE = {'type': 'http', 'method': 'GET', 'path': '/tasks/'}
+
+
+async def bare_app(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b'{}'})
+
+
+async def receive():
+    return {'type': 'http.request', 'body': b''}
+
+
+async def send(message):
+    pass
+
+
+@pytest.mark.parametrize(
+    'app', [bare_app, MetricsMiddleware(bare_app)], ids=['bare', 'instrumented']
+)
+def test_request_instrumentation_overhead(benchmark, app):
+    loop = asyncio.new_event_loop()
+
+    async def requests(rounds=1000):
+        for _ in range(rounds):
+            await app(dict(SCOPE), receive, send)
+
+    benchmark.extra_info['requests_per_round'] = 1000
+    benchmark(lambda: loop.run_until_complete(requests()))
+    loop.close()
+
+
+def test_histogram_observe(benchmark):
+    series = http_request_duration_seconds.labels('GET', '/benchmark', 200)
+
+    benchmark(series.observe, 0.0042)
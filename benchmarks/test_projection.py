@@ -0,0 +1,48 @@
+import asyncio
+import tracemalloc
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert, select
+
+from curso_fastapi.models import Task
+from curso_fastapi.routers.tasks import TASK_COLUMNS
+from tests.conftest import TaskFactory
+
+PAGE_SIZE = 10_000
+
+
+@pytest_asyncio.fixture
+async def seeded_session(session, user):
+    await session.execute(
+        insert(Task),
+        [
+            {**TaskFactory.build().__dict__, 'user_id': user.id}
+            for _ in range(PAGE_SIZE)
+        ],
+    )
+    await session.commit()
+    return session
+
+
+@pytest.mark.parametrize(
+    'query',
+    [select(Task), select(*TASK_COLUMNS)],
+    ids=['orm-entities', 'column-projection'],
+)
+def test_load_10k_task_page(benchmark, seeded_session, query):
+    loop = asyncio.get_event_loop()
+
+    def load_page():
+        result = loop.run_until_complete(seeded_session.execute(query))
+        rows = result.all()
+        seeded_session.expunge_all()
+        return rows
+
+    tracemalloc.start()
+    load_page()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    benchmark.extra_info['peak_memory_kib'] = peak // 1024
+
+    benchmark.pedantic(load_page, rounds=5)
@@ -0,0 +1,22 @@
+from curso_fastapi.schemas import TaskCreate, TaskFilter, UserCreate
+
+
+def test_validate_user_create(benchmark):
+    benchmark(
+        UserCreate.model_validate,
+        {'username': 'alice', 'email': 'alice@example.com', 'password': 'secret'},
+    )
+
+
+def test_validate_task_create(benchmark):
+    benchmark(
+        TaskCreate.model_validate,
+        {'title': 'Title', 'description': 'Description', 'state': 'todo'},
+    )
+
+
+def test_validate_task_filter(benchmark):
+    benchmark(
+        TaskFilter.model_validate,
+        {'title': 'Title', 'state': 'doing', 'offset': '20', 'limit': '50'},
+    )
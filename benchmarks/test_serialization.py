@@ -0,0 +1,43 @@
+import orjson
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from curso_fastapi.models import TaskState
+from curso_fastapi.schemas import ListTasks
+from tests.conftest import TaskFactory
+
+PAGE_SIZE = 1000
+
+
+@pytest.fixture
+def rows():
+    return [
+        {
+            'id': task_id,
+            'title': f'Task {task_id}',
+            'description': 'Description',
+            'state': TaskState.TODO,
+        }
+        for task_id in range(PAGE_SIZE)
+    ]
+
+
+def test_response_model_serialization(benchmark, rows):
+    def serialize():
+        content = jsonable_encoder(ListTasks.model_validate({'tasks': rows}))
+        return orjson.dumps(content)
+
+    benchmark(serialize)
+
+
+def test_row_fast_path_serialization(benchmark, rows):
+    benchmark(orjson.dumps, {'tasks': rows, 'next_cursor': None})
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_page(benchmark, client, token, session, user):
+    session.add_all(TaskFactory.create_batch(PAGE_SIZE, user_id=user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    benchmark(client.get, f'/tasks/?limit={PAGE_SIZE}', headers=headers)
@@ -0,0 +1,74 @@
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from curso_fastapi.models import table_registry
+from curso_fastapi.routers import tasks
+from curso_fastapi.schemas import TaskFilter
+from curso_fastapi.settings import settings
+
+DATASET_SIZE = int(os.environ.get('BENCH_TASKS', 1_000_000))
+
+
+@pytest.fixture(scope='module')
+def database_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp('total_count') / 'tasks.db'
+    engine = create_engine(f'sqlite:///{path}')
+    table_registry.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            'INSERT INTO users (username, email, password) '
+            "VALUES ('bench', 'bench@test.com', 'bench')"
+        )
+        conn.exec_driver_sql(
+            'WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n '
+            f'WHERE i < {DATASET_SIZE}) '
+            'INSERT INTO tasks (title, description, state, user_id) '
+            "SELECT 'Task ' || i, 'Description ' || i, "
+            "CASE i % 5 WHEN 0 THEN 'DRAFT' WHEN 1 THEN 'TODO' WHEN 2 THEN 'DOING' "
+            "WHEN 3 THEN 'DONE' ELSE 'TRASH' END, 1 FROM n"
+        )
+    engine.dispose()
+    return path
+
+
+@pytest.fixture
+def load_page(database_path):
+    loop = asyncio.new_event_loop()
+    engine = create_async_engine(f'sqlite+aiosqlite:///{database_path}')
+    session = AsyncSession(engine)
+
+    def load(filters):
+        return loop.run_until_complete(tasks.load_tasks_page(session, 1, filters))
+
+    yield load
+    loop.run_until_complete(session.close())
+    loop.run_until_complete(engine.dispose())
+    loop.close()
+
+
+@pytest.mark.parametrize(
+    'threshold',
+    [None, 10_000, DATASET_SIZE],
+    ids=['no-total', 'bounded-total', 'exact-total'],
+)
+@pytest.mark.parametrize(
+    'filter_fields',
+    [{'state': 'doing'}, {'title': 'Task 1'}],
+    ids=['indexed-state', 'title-scan'],
+)
+def test_list_page_total_count(
+    benchmark, load_page, monkeypatch, threshold, filter_fields
+):
+    if threshold:
+        monkeypatch.setattr(settings, 'TASKS_TOTAL_EXACT_THRESHOLD', threshold)
+    filters = TaskFilter(**filter_fields, limit=20, include_total=threshold is not None)
+
+    page = benchmark(load_page, filters)
+
+    benchmark.extra_info['dataset_size'] = DATASET_SIZE
+    benchmark.extra_info['total'] = page.get('total')
+    benchmark.extra_info['total_exact'] = page.get('total_exact')
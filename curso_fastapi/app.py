@@ -1,11 +1,71 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from hmac import compare_digest
+from http import HTTPStatus
+from typing import Annotated
 
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from fastapi.security.utils import get_authorization_scheme_param
+
+from curso_fastapi.archive import run_archiver
+from curso_fastapi.database import engine
+from curso_fastapi.hashing import hashing_pool
+from curso_fastapi.jobs import job_queue
+from curso_fastapi.metrics import MetricsMiddleware, registry
+from curso_fastapi.profiling import ProfilingMiddleware
+from curso_fastapi.replicas import replica_set, run_health_checks
 from curso_fastapi.routers.auth import auth_router
 from curso_fastapi.routers.tasks import tasks_router
 from curso_fastapi.routers.users import user_router
+from curso_fastapi.settings import settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    background = []
+    if settings.ARCHIVE_ENABLED:
+        background.append(asyncio.create_task(run_archiver(engine)))
+    if replica_set.replicas:
+        background.append(
+            asyncio.create_task(
+                run_health_checks(
+                    settings.DATABASE_REPLICA_HEALTH_CHECK_SECONDS,
+                    settings.DATABASE_REPLICA_HEALTH_CHECK_TIMEOUT,
+                )
+            )
+        )
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    for task in background:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    hashing_pool.shutdown()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(user_router)
 app.include_router(auth_router)
 app.include_router(tasks_router)
+
+
+@app.get('/metrics', response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(authorization: Annotated[str | None, Header()] = None):
+    if settings.METRICS_TOKEN is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Not Found')
+
+    scheme, token = get_authorization_scheme_param(authorization)
+    if scheme.lower() != 'bearer' or not compare_digest(
+        token.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail='Could not validate credentials',
+            headers={'WWW-Authenticate': 'Bearer'},
+        )
+    return registry.render()
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from zoneinfo import ZoneInfo
+
+from curso_fastapi.metrics import Counter
+from curso_fastapi.models import ArchivedTask, Task, TaskState
+from curso_fastapi.routers.tasks import tasks_cache
+from curso_fastapi.settings import settings
+
+logger = logging.getLogger('curso_fastapi.archive')
+
+ARCHIVABLE_STATES = (TaskState.TRASH, TaskState.DONE)
+ARCHIVED_COLUMNS = (
+    'id',
+    'title',
+    'description',
+    'state',
+    'created_at',
+    'updated_at',
+    'user_id',
+)
+
+archived_tasks_total = Counter(
+    'archived_tasks_total', 'Tasks moved from the hot table into the archive'
+)
+
+
+async def archive_batch(session, older_than: datetime, batch_size: int):
+    rows = (
+        await session.execute(
+            select(Task.id, Task.user_id)
+            .where(Task.state.in_(ARCHIVABLE_STATES), Task.updated_at < older_than)
+            .order_by(Task.updated_at)
+            .limit(batch_size)
+        )
+    ).all()
+    if not rows:
+        return 0
+
+    task_ids = [row.id for row in rows]
+
+    await session.execute(
+        insert(ArchivedTask).from_select(
+            ARCHIVED_COLUMNS,
+            select(*(getattr(Task, column) for column in ARCHIVED_COLUMNS)).where(
+                Task.id.in_(task_ids)
+            ),
+        )
+    )
+    await session.execute(delete(Task).where(Task.id.in_(task_ids)))
+    await session.commit()
+    for user_id in {row.user_id for row in rows}:
+        tasks_cache.invalidate(user_id)
+
+    archived_tasks_total.inc(len(task_ids))
+    return len(task_ids)
+
+
+async def archive_tasks(session, older_than: datetime, batch_size: int):
+    archived = 0
+    while True:
+        moved = await archive_batch(session, older_than, batch_size)
+        archived += moved
+        if moved < batch_size:
+            return archived
+
+
+async def run_archiver(bind):
+    while True:
+        older_than = datetime.now(tz=ZoneInfo('UTC')).replace(tzinfo=None) - timedelta(
+            days=settings.ARCHIVE_AFTER_DAYS
+        )
+        try:
+            async with AsyncSession(bind, expire_on_commit=False) as session:
+                archived = await archive_tasks(
+                    session, older_than, settings.ARCHIVE_BATCH_SIZE
+                )
+            if archived:
+                logger.info('Archived %s tasks', archived)
+        except Exception:
+            logger.exception('Task archival failed')
+        await asyncio.sleep(settings.ARCHIVE_INTERVAL_SECONDS)
@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from importlib import import_module
+from time import time, time_ns
+from typing import Protocol
+
+
+class TTLCache:
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is not None:
+            value, expires_at = item
+            if expires_at > time():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+
+        self.misses += 1
+        return default
+
+    def set(self, key, value, expires_at=None):
+        if self.maxsize <= 0:
+            return
+
+        if expires_at is None:
+            expires_at = time() + self.ttl
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str, default=None): ...
+
+    def set(self, key: str, value, expires_at: float | None = None): ...
+
+    def delete(self, key: str): ...
+
+    def clear(self): ...
+
+
+def load_backend(path: str) -> CacheBackend:
+    module_name, _, attribute = path.partition(':')
+    return getattr(import_module(module_name), attribute)()
+
+
+class ResultCache:
+    def __init__(self, backend: CacheBackend, namespace: str, shared=False):
+        self.backend = backend
+        self.namespace = namespace
+        # Whether every worker reads and writes the same backend.
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def _generation_key(self, owner):
+        return f'{self.namespace}:{owner}:generation'
+
+    def _generation(self, owner):
+        generation = self.backend.get(self._generation_key(owner))
+        if generation is None:
+            generation = self.invalidate(owner)
+        return generation
+
+    def key(self, owner, digest: str):
+        return f'{self.namespace}:{owner}:{self._generation(owner)}:{digest}'
+
+    def get(self, key: str):
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value):
+        self.backend.set(key, value)
+
+    def invalidate(self, owner):
+        generation = time_ns()
+        self.backend.set(self._generation_key(owner), generation, float('inf'))
+        return generation
+
+    def clear(self):
+        self.backend.clear()
@@ -1,11 +1,126 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
+from contextvars import ContextVar
+from time import perf_counter
 
-from curso_fastapi.settings import Settings
+from sqlalchemy import event, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, StaticPool
 
-engine = create_engine(Settings().DATABASE_URL)
+from curso_fastapi.metrics import Counter, Gauge, Histogram
+from curso_fastapi.settings import settings
 
+pool_wait_seconds = Histogram(
+    'db_pool_wait_seconds',
+    'Time spent waiting for a pooled connection, excluding opening new ones',
+)
+pool_connect_seconds = Histogram(
+    'db_pool_connect_seconds', 'Time spent opening a new database connection'
+)
+pool_overflow_total = Counter(
+    'db_pool_overflow_total', 'Connections opened beyond the pool size'
+)
 
-def get_session():  # pragma: no cover
-    with Session(engine) as session:
+
+# Seconds the current checkout spent opening connections; None outside _do_get.
+connecting_seconds = ContextVar('connecting_seconds', default=None)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        if connecting_seconds.get() is not None:
+            return super()._do_get()
+
+        start = perf_counter()
+        token = connecting_seconds.set(0.0)
+        try:
+            return super()._do_get()
+        finally:
+            waited = perf_counter() - start - connecting_seconds.get()
+            connecting_seconds.reset(token)
+            pool_wait_seconds.observe(waited)
+
+    def _create_connection(self):
+        start = perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            elapsed = connecting_seconds.get()
+            if elapsed is not None:
+                connecting_seconds.set(elapsed + perf_counter() - start)
+
+
+def instrument_engine(engine):
+    pool = engine.sync_engine.pool
+
+    @event.listens_for(engine.sync_engine, 'do_connect')
+    def receive_do_connect(dialect, connection_record, cargs, cparams):
+        connection_record.info['connect_started_at'] = perf_counter()
+
+    @event.listens_for(pool, 'connect')
+    def receive_connect(dbapi_connection, connection_record):
+        started_at = connection_record.info.pop('connect_started_at', None)
+        if started_at is not None:
+            pool_connect_seconds.observe(perf_counter() - started_at)
+        if isinstance(pool, AsyncAdaptedQueuePool) and pool.overflow() > 0:
+            pool_overflow_total.inc()
+
+
+def is_memory_database(url):
+    url = make_url(url)
+    return url.get_backend_name() == 'sqlite' and url.database in {None, '', ':memory:'}
+
+
+def pool_options(url):
+    pool_class = settings.DATABASE_POOL_CLASS
+    if pool_class is None:
+        # Every connection to an in-memory SQLite database opens a new, empty
+        # database, so it has to share a single one.
+        pool_class = 'static' if is_memory_database(url) else 'queue'
+
+    if pool_class == 'static':
+        return {'poolclass': StaticPool}
+    if pool_class == 'null':
+        return {'poolclass': NullPool}
+    return {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': settings.DATABASE_POOL_SIZE,
+        'max_overflow': settings.DATABASE_MAX_OVERFLOW,
+        'pool_timeout': settings.DATABASE_POOL_TIMEOUT,
+        'pool_use_lifo': settings.DATABASE_POOL_USE_LIFO,
+    }
+
+
+def create_engine(url):
+    engine = create_async_engine(
+        url,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+        **pool_options(url),
+    )
+    instrument_engine(engine)
+    return engine
+
+
+engine = create_engine(settings.DATABASE_URL)
+
+
+# StaticPool and NullPool keep no counters, so they report zero.
+Gauge(
+    'db_pool_size',
+    'Configured pool size',
+    function=getattr(engine.pool, 'size', lambda: 0),
+)
+Gauge(
+    'db_pool_checked_out',
+    'Connections currently checked out',
+    function=getattr(engine.pool, 'checkedout', lambda: 0),
+)
+Gauge(
+    'db_pool_overflow',
+    'Current pool overflow',
+    function=getattr(engine.pool, 'overflow', lambda: 0),
+)
+
+
+async def get_session():  # pragma: no cover
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
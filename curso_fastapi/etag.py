@@ -0,0 +1,29 @@
+from hashlib import blake2b
+from http import HTTPStatus
+
+import orjson
+from fastapi import Request, Response
+
+from curso_fastapi.settings import settings
+
+
+def make_etag(*parts):
+    digest = blake2b(orjson.dumps(parts, default=str), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str):
+    header = request.headers.get('if-none-match')
+    if header is None:
+        return False
+    if header.strip() == '*':
+        return True
+    return etag in {tag.strip().removeprefix('W/') for tag in header.split(',')}
+
+
+def cache_headers(etag: str):
+    return {'ETag': etag, 'Cache-Control': settings.CACHE_CONTROL}
+
+
+def not_modified(etag: str):
+    return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=cache_headers(etag))
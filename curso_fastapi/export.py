@@ -0,0 +1,38 @@
+import csv
+from enum import Enum
+from io import StringIO
+
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession
+
+MEDIA_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def format_ndjson(rows):
+    return b''.join(
+        orjson.dumps(row._asdict(), option=orjson.OPT_APPEND_NEWLINE) for row in rows
+    )
+
+
+def format_csv(rows, header=None):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(header)
+    for row in rows:
+        writer.writerow(
+            value.value if isinstance(value, Enum) else value for value in row
+        )
+    return buffer.getvalue()
+
+
+async def stream_rows(bind, query, export_format, batch_size):
+    async with AsyncSession(bind) as session:
+        result = await session.stream(query.execution_options(yield_per=batch_size))
+        if export_format == 'csv':
+            yield format_csv([], header=result.keys())
+        async for rows in result.partitions():
+            if export_format == 'csv':
+                yield format_csv(rows)
+            else:
+                yield format_ndjson(rows)
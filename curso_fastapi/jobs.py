@@ -0,0 +1,301 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import JSON, Index, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Mapped, mapped_column, registry
+from zoneinfo import ZoneInfo
+
+from curso_fastapi.database import engine
+from curso_fastapi.metrics import Counter, Gauge, Histogram
+from curso_fastapi.settings import settings
+
+logger = logging.getLogger('curso_fastapi.jobs')
+jobs_registry = registry()
+
+# Upper bound on how long an idle worker sleeps before looking at the table again.
+IDLE_POLL_SECONDS = 60.0
+
+
+class JobStatus:
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+def utcnow():
+    return datetime.now(tz=ZoneInfo('UTC')).replace(tzinfo=None)
+
+
+@jobs_registry.mapped_as_dataclass
+class Job:
+    __tablename__ = 'jobs'
+    __table_args__ = (Index('ix_jobs_status_run_at', 'status', 'run_at'),)
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    name: Mapped[str] = mapped_column()
+    payload: Mapped[dict] = mapped_column(JSON)
+    run_at: Mapped[datetime] = mapped_column()
+    created_at: Mapped[datetime] = mapped_column(default_factory=utcnow)
+    status: Mapped[str] = mapped_column(default=JobStatus.PENDING)
+    attempts: Mapped[int] = mapped_column(default=0)
+    started_at: Mapped[datetime | None] = mapped_column(default=None)
+    finished_at: Mapped[datetime | None] = mapped_column(default=None)
+    last_error: Mapped[str | None] = mapped_column(default=None)
+    claimed_by: Mapped[str | None] = mapped_column(default=None)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(default=None)
+
+
+jobs_total = Counter(
+    'jobs_total', 'Job runs by outcome', labelnames=('name', 'outcome')
+)
+job_latency_seconds = Histogram(
+    'job_latency_seconds',
+    'Time from enqueueing a job to its successful completion',
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0),
+    labelnames=('name',),
+)
+job_run_seconds = Histogram(
+    'job_run_seconds', 'Time spent running a single job attempt', labelnames=('name',)
+)
+
+
+class JobQueue:
+    def __init__(self, store, bind, workers=1, max_attempts=5, retry_backoff=1.0):
+        self.store = store
+        self.bind = bind
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        # A running job belongs to this queue until its lease expires; the lease
+        # is renewed while the handler runs.
+        self.lease_seconds = settings.JOBS_LEASE_SECONDS
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}'
+        self.handlers = {}
+        self.depth = 0
+        self._tasks = []
+        self._wakeup = None
+
+    def job(self, name):
+        def register(handler):
+            self.handlers[name] = handler
+            return handler
+
+        return register
+
+    async def start(self):
+        async with self.store.begin() as conn:
+            await conn.run_sync(jobs_registry.metadata.create_all)
+        await self.requeue_expired()
+        await self.refresh_depth()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, name, delay=0, **payload):
+        async with AsyncSession(self.store, expire_on_commit=False) as session:
+            job = Job(
+                name=name,
+                payload=payload,
+                run_at=utcnow() + timedelta(seconds=delay),
+            )
+            session.add(job)
+            await session.commit()
+        self.depth += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job.id
+
+    async def requeue_expired(self):
+        # Jobs whose owner died without finishing them are picked up again.
+        # Jobs that another live process is still running keep their lease.
+        async with AsyncSession(self.store) as session:
+            requeued = await session.execute(
+                update(Job)
+                .where(
+                    Job.status == JobStatus.RUNNING,
+                    or_(
+                        Job.lease_expires_at.is_(None),
+                        Job.lease_expires_at < utcnow(),
+                    ),
+                )
+                .values(
+                    status=JobStatus.PENDING, claimed_by=None, lease_expires_at=None
+                )
+            )
+            await session.commit()
+        if requeued.rowcount:
+            logger.warning('Requeued %s jobs with expired leases', requeued.rowcount)
+            self.depth += requeued.rowcount
+        return requeued.rowcount
+
+    async def refresh_depth(self):
+        async with AsyncSession(self.store) as session:
+            self.depth = await session.scalar(
+                select(func.count())
+                .select_from(Job)
+                .where(Job.status == JobStatus.PENDING)
+            )
+
+    async def next_run_in(self):
+        async with AsyncSession(self.store) as session:
+            run_at = await session.scalar(
+                select(func.min(Job.run_at)).where(Job.status == JobStatus.PENDING)
+            )
+        if run_at is None:
+            return IDLE_POLL_SECONDS
+        return min(max((run_at - utcnow()).total_seconds(), 0), IDLE_POLL_SECONDS)
+
+    async def claim(self):
+        async with AsyncSession(self.store, expire_on_commit=False) as session:
+            job = await session.scalar(
+                select(Job)
+                .where(Job.status == JobStatus.PENDING, Job.run_at <= utcnow())
+                .order_by(Job.run_at, Job.id)
+                .limit(1)
+            )
+            if job is None:
+                return None
+            claimed = await session.execute(
+                update(Job)
+                .where(Job.id == job.id, Job.status == JobStatus.PENDING)
+                .values(
+                    status=JobStatus.RUNNING,
+                    attempts=Job.attempts + 1,
+                    started_at=utcnow(),
+                    claimed_by=self.worker_id,
+                    lease_expires_at=self.lease_expires_at(),
+                )
+            )
+            await session.commit()
+            if claimed.rowcount == 0:
+                return await self.claim()
+            await session.refresh(job)
+        self.depth = max(self.depth - 1, 0)
+        return job
+
+    def lease_expires_at(self):
+        return utcnow() + timedelta(seconds=self.lease_seconds)
+
+    def owned(self, job):
+        return (Job.id == job.id, Job.claimed_by == self.worker_id)
+
+    async def renew_lease(self, job):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            async with AsyncSession(self.store) as session:
+                await session.execute(
+                    update(Job)
+                    .where(*self.owned(job))
+                    .values(lease_expires_at=self.lease_expires_at())
+                )
+                await session.commit()
+
+    async def finish(self, job, **values):
+        async with AsyncSession(self.store) as session:
+            finished = await session.execute(
+                update(Job)
+                .where(*self.owned(job))
+                .values(claimed_by=None, lease_expires_at=None, **values)
+            )
+            await session.commit()
+        if finished.rowcount == 0:
+            logger.warning('Job %s (%s) lost its lease', job.id, job.name)
+
+    async def run(self, job):
+        handler = self.handlers.get(job.name)
+        started_at = utcnow()
+        try:
+            if handler is None:
+                raise LookupError(f'No handler registered for job {job.name!r}')
+            renewal = asyncio.create_task(self.renew_lease(job))
+            try:
+                async with AsyncSession(self.bind, expire_on_commit=False) as session:
+                    await handler(session, **job.payload)
+            finally:
+                renewal.cancel()
+        except Exception as exc:
+            job_run_seconds.labels(job.name).observe(
+                (utcnow() - started_at).total_seconds()
+            )
+            await self.retry_or_fail(job, exc)
+            return
+
+        finished_at = utcnow()
+        job_run_seconds.labels(job.name).observe(
+            (finished_at - started_at).total_seconds()
+        )
+        job_latency_seconds.labels(job.name).observe(
+            (finished_at - job.created_at).total_seconds()
+        )
+        jobs_total.labels(job.name, JobStatus.DONE).inc()
+        await self.finish(job, status=JobStatus.DONE, finished_at=finished_at)
+
+    async def retry_or_fail(self, job, exc):
+        error = f'{type(exc).__name__}: {exc}'
+        if job.attempts >= self.max_attempts or job.name not in self.handlers:
+            logger.exception('Job %s (%s) failed for good', job.id, job.name)
+            jobs_total.labels(job.name, JobStatus.FAILED).inc()
+            await self.finish(
+                job, status=JobStatus.FAILED, finished_at=utcnow(), last_error=error
+            )
+            return
+
+        delay = self.retry_backoff * 2 ** (job.attempts - 1)
+        logger.warning(
+            'Job %s (%s) failed, retrying in %ss: %s', job.id, job.name, delay, error
+        )
+        jobs_total.labels(job.name, 'retried').inc()
+        await self.finish(
+            job,
+            status=JobStatus.PENDING,
+            run_at=utcnow() + timedelta(seconds=delay),
+            last_error=error,
+        )
+        self.depth += 1
+
+    async def run_pending(self):
+        ran = 0
+        while (job := await self.claim()) is not None:
+            await self.run(job)
+            ran += 1
+        return ran
+
+    async def worker(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.requeue_expired()
+                await self.run_pending()
+                timeout = min(await self.next_run_in(), self.lease_seconds)
+            except Exception:
+                logger.exception('Job worker failed to poll the queue')
+                timeout = IDLE_POLL_SECONDS
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+job_queue = JobQueue(
+    create_async_engine(settings.JOBS_DATABASE_URL),
+    engine,
+    workers=settings.JOBS_WORKERS,
+    max_attempts=settings.JOBS_MAX_ATTEMPTS,
+    retry_backoff=settings.JOBS_RETRY_BACKOFF_SECONDS,
+)
+Gauge(
+    'jobs_queue_depth',
+    'Jobs waiting to run, including scheduled retries',
+    function=lambda: job_queue.depth,
+)
@@ -0,0 +1,196 @@
+from bisect import bisect_left
+from time import perf_counter
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{name}="{value}"' for name, value in labels)
+    return f'{{{pairs}}}'
+
+
+class Metric:
+    def __init__(self, name, documentation, labelnames=(), registry=registry):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = self.child()
+        return child
+
+    def child(self):
+        return type(self)(self.name, self.documentation, registry=None)
+
+    def samples(self):
+        if not self.labelnames:
+            return self.labeled_samples(())
+        lines = []
+        for values, child in self.children.items():
+            lines.extend(child.labeled_samples(tuple(zip(self.labelnames, values))))
+        return lines
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def __init__(
+        self, name, documentation, function=None, labelnames=(), registry=registry
+    ):
+        super().__init__(name, documentation, labelnames, registry)
+        self.function = function
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def labeled_samples(self, labels):
+        value = self.function() if self.function else self.value
+        return [f'{self.name}{format_labels(labels)} {value}']
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def __init__(
+        self, name, documentation, function=None, labelnames=(), registry=registry
+    ):
+        super().__init__(name, documentation, labelnames, registry)
+        self.function = function
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def labeled_samples(self, labels):
+        value = self.function() if self.function else self.value
+        return [f'{self.name}{format_labels(labels)} {value}']
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(
+        self,
+        name,
+        documentation,
+        buckets=DEFAULT_BUCKETS,
+        labelnames=(),
+        registry=registry,
+    ):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def child(self):
+        return Histogram(
+            self.name, self.documentation, buckets=self.buckets, registry=None
+        )
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def labeled_samples(self, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            bucket_labels = format_labels((*labels, ('le', bound)))
+            lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+        bucket_labels = format_labels((*labels, ('le', '+Inf')))
+        lines.append(f'{self.name}_bucket{bucket_labels} {self.count}')
+        lines.append(f'{self.name}_sum{format_labels(labels)} {self.sum}')
+        lines.append(f'{self.name}_count{format_labels(labels)} {self.count}')
+        return lines
+
+
+http_requests_in_flight = Gauge(
+    'http_requests_in_flight', 'Requests currently being handled'
+)
+http_request_duration_seconds = Histogram(
+    'http_request_duration_seconds',
+    'Request latency by route',
+    labelnames=('method', 'route', 'status'),
+)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        http_requests_in_flight.inc()
+        started_at = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            route = scope.get('route')
+            http_request_duration_seconds.labels(
+                scope['method'], route.path if route else '', status_code
+            ).observe(perf_counter() - started_at)
@@ -1,7 +1,7 @@
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import DDL, ForeignKey, Index, event, func
 from sqlalchemy.orm import Mapped, mapped_column, registry
 
 table_registry = registry()
@@ -10,6 +10,7 @@ table_registry = registry()
 @table_registry.mapped_as_dataclass
 class User:
     __tablename__ = 'users'
+    __mapper_args__ = {'eager_defaults': True}
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     username: Mapped[str] = mapped_column(unique=True)
@@ -19,6 +20,7 @@ class User:
     updated_at: Mapped[datetime] = mapped_column(
         server_default=func.now(), onupdate=func.now(), init=False
     )
+    deleted_at: Mapped[datetime | None] = mapped_column(default=None, init=False)
 
 
 class TaskState(str, Enum):
@@ -32,6 +34,14 @@ class TaskState(str, Enum):
 @table_registry.mapped_as_dataclass
 class Task:
     __tablename__ = 'tasks'
+    __table_args__ = (
+        Index('ix_tasks_user_id_id', 'user_id', 'id'),
+        Index('ix_tasks_user_id_state_id', 'user_id', 'state', 'id'),
+        Index('ix_tasks_user_id_updated_at', 'user_id', 'updated_at'),
+        Index('ix_tasks_state_updated_at', 'state', 'updated_at'),
+        {'sqlite_autoincrement': True},
+    )
+    __mapper_args__ = {'eager_defaults': True}
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     title: Mapped[str] = mapped_column()
@@ -43,3 +53,176 @@ class Task:
     )
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
     # user: Mapped[User] = mapped_column(relation='User')
+
+
+@table_registry.mapped_as_dataclass
+class ArchivedTask:
+    __tablename__ = 'archived_tasks'
+    __table_args__ = (Index('ix_archived_tasks_user_id_id', 'user_id', 'id'),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    title: Mapped[str] = mapped_column()
+    description: Mapped[str] = mapped_column()
+    state: Mapped[TaskState] = mapped_column()
+    created_at: Mapped[datetime] = mapped_column()
+    updated_at: Mapped[datetime] = mapped_column()
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
+    archived_at: Mapped[datetime] = mapped_column(server_default=func.now(), init=False)
+
+
+@table_registry.mapped_as_dataclass
+class TaskStateCount:
+    __tablename__ = 'task_state_counts'
+
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.id'), primary_key=True)
+    state: Mapped[TaskState] = mapped_column(primary_key=True)
+    count: Mapped[int] = mapped_column(default=0)
+
+
+@table_registry.mapped_as_dataclass
+class TaskVersion:
+    __tablename__ = 'task_versions'
+
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.id'), primary_key=True)
+    version: Mapped[int] = mapped_column(default=0)
+
+
+SQLITE_SEARCH_DDL = (
+    'CREATE VIRTUAL TABLE tasks_fts USING fts5('
+    "title, description, content='tasks', content_rowid='id')",
+    'CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN '
+    'INSERT INTO tasks_fts(rowid, title, description) '
+    'VALUES (new.id, new.title, new.description); END',
+    'CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN '
+    'INSERT INTO tasks_fts(tasks_fts, rowid, title, description) '
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    'CREATE TRIGGER tasks_fts_update AFTER UPDATE OF title, description ON tasks '
+    'BEGIN '
+    'INSERT INTO tasks_fts(tasks_fts, rowid, title, description) '
+    "VALUES ('delete', old.id, old.title, old.description); "
+    'INSERT INTO tasks_fts(rowid, title, description) '
+    'VALUES (new.id, new.title, new.description); END',
+)
+POSTGRESQL_SEARCH_DDL = (
+    'ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS '
+    "(to_tsvector('simple', title || ' ' || description)) STORED",
+    'CREATE INDEX ix_tasks_search_vector ON tasks USING gin (search_vector)',
+)
+
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(
+        Task.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite')
+    )
+for statement in POSTGRESQL_SEARCH_DDL:
+    event.listen(
+        Task.__table__,
+        'after_create',
+        DDL(statement).execute_if(dialect='postgresql'),
+    )
+event.listen(
+    Task.__table__,
+    'before_drop',
+    DDL('DROP TABLE IF EXISTS tasks_fts').execute_if(dialect='sqlite'),
+)
+
+SQLITE_STATE_COUNTS_DDL = (
+    'CREATE TRIGGER task_state_counts_insert AFTER INSERT ON tasks BEGIN '
+    'INSERT INTO task_state_counts(user_id, state, count) '
+    'VALUES (new.user_id, new.state, 1) '
+    'ON CONFLICT(user_id, state) DO UPDATE SET count = count + 1; END',
+    'CREATE TRIGGER task_state_counts_delete AFTER DELETE ON tasks BEGIN '
+    'UPDATE task_state_counts SET count = count - 1 '
+    'WHERE user_id = old.user_id AND state = old.state; END',
+    'CREATE TRIGGER task_state_counts_update AFTER UPDATE OF state, user_id '
+    'ON tasks WHEN old.state IS NOT new.state OR old.user_id IS NOT new.user_id '
+    'BEGIN '
+    'UPDATE task_state_counts SET count = count - 1 '
+    'WHERE user_id = old.user_id AND state = old.state; '
+    'INSERT INTO task_state_counts(user_id, state, count) '
+    'VALUES (new.user_id, new.state, 1) '
+    'ON CONFLICT(user_id, state) DO UPDATE SET count = count + 1; END',
+)
+POSTGRESQL_STATE_COUNTS_DDL = (
+    'CREATE FUNCTION task_state_counts_refresh() RETURNS trigger AS $$ BEGIN '
+    "IF TG_OP IN ('UPDATE', 'DELETE') THEN "
+    'UPDATE task_state_counts SET count = count - 1 '
+    'WHERE user_id = OLD.user_id AND state = OLD.state; '
+    'END IF; '
+    "IF TG_OP IN ('INSERT', 'UPDATE') THEN "
+    'INSERT INTO task_state_counts (user_id, state, count) '
+    'VALUES (NEW.user_id, NEW.state, 1) '
+    'ON CONFLICT (user_id, state) '
+    'DO UPDATE SET count = task_state_counts.count + 1; '
+    'END IF; '
+    'RETURN NULL; END $$ LANGUAGE plpgsql',
+    'CREATE TRIGGER task_state_counts_refresh '
+    'AFTER INSERT OR DELETE OR UPDATE OF state, user_id ON tasks '
+    'FOR EACH ROW EXECUTE FUNCTION task_state_counts_refresh()',
+)
+
+for statement in SQLITE_STATE_COUNTS_DDL:
+    event.listen(
+        Task.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite')
+    )
+for statement in POSTGRESQL_STATE_COUNTS_DDL:
+    event.listen(
+        Task.__table__,
+        'after_create',
+        DDL(statement).execute_if(dialect='postgresql'),
+    )
+event.listen(
+    Task.__table__,
+    'after_drop',
+    DDL('DROP FUNCTION IF EXISTS task_state_counts_refresh()').execute_if(
+        dialect='postgresql'
+    ),
+)
+
+SQLITE_TASK_VERSIONS_DDL = (
+    'CREATE TRIGGER task_versions_insert AFTER INSERT ON tasks BEGIN '
+    'INSERT INTO task_versions(user_id, version) VALUES (new.user_id, 1) '
+    'ON CONFLICT(user_id) DO UPDATE SET version = version + 1; END',
+    'CREATE TRIGGER task_versions_delete AFTER DELETE ON tasks BEGIN '
+    'INSERT INTO task_versions(user_id, version) VALUES (old.user_id, 1) '
+    'ON CONFLICT(user_id) DO UPDATE SET version = version + 1; END',
+    'CREATE TRIGGER task_versions_update AFTER UPDATE ON tasks BEGIN '
+    'INSERT INTO task_versions(user_id, version) VALUES (new.user_id, 1) '
+    'ON CONFLICT(user_id) DO UPDATE SET version = version + 1; '
+    'UPDATE task_versions SET version = version + 1 '
+    'WHERE user_id = old.user_id AND old.user_id IS NOT new.user_id; END',
+)
+POSTGRESQL_TASK_VERSIONS_DDL = (
+    'CREATE FUNCTION task_versions_bump() RETURNS trigger AS $$ BEGIN '
+    "IF TG_OP IN ('UPDATE', 'DELETE') THEN "
+    'INSERT INTO task_versions (user_id, version) VALUES (OLD.user_id, 1) '
+    'ON CONFLICT (user_id) '
+    'DO UPDATE SET version = task_versions.version + 1; '
+    'END IF; '
+    "IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND OLD.user_id <> NEW.user_id) THEN "
+    'INSERT INTO task_versions (user_id, version) VALUES (NEW.user_id, 1) '
+    'ON CONFLICT (user_id) '
+    'DO UPDATE SET version = task_versions.version + 1; '
+    'END IF; '
+    'RETURN NULL; END $$ LANGUAGE plpgsql',
+    'CREATE TRIGGER task_versions_bump '
+    'AFTER INSERT OR DELETE OR UPDATE ON tasks '
+    'FOR EACH ROW EXECUTE FUNCTION task_versions_bump()',
+)
+
+for statement in SQLITE_TASK_VERSIONS_DDL:
+    event.listen(
+        Task.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite')
+    )
+for statement in POSTGRESQL_TASK_VERSIONS_DDL:
+    event.listen(
+        Task.__table__,
+        'after_create',
+        DDL(statement).execute_if(dialect='postgresql'),
+    )
+event.listen(
+    Task.__table__,
+    'after_drop',
+    DDL('DROP FUNCTION IF EXISTS task_versions_bump()').execute_if(
+        dialect='postgresql'
+    ),
+)
@@ -0,0 +1,58 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+from http import HTTPStatus
+
+import orjson
+from fastapi import HTTPException
+from sqlalchemy import func, select, text
+
+
+def encode_cursor(last_id: int):
+    return urlsafe_b64encode(json.dumps({'id': last_id}).encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        last_id = json.loads(urlsafe_b64decode(cursor.encode()))['id']
+    except (Base64Error, ValueError, TypeError, KeyError):
+        last_id = None
+    if not isinstance(last_id, int):
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor')
+    return last_id
+
+
+async def paginate(session, query, limit, offset=0, cursor=None):
+    id_column = query.selected_columns.id
+    if cursor:
+        query = query.filter(id_column > decode_cursor(cursor))
+    else:
+        query = query.offset(offset)
+    result = await session.execute(query.order_by(id_column).limit(limit + 1))
+    items = result.all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        # An empty page (limit=0) has no last row to continue from.
+        if items:
+            next_cursor = encode_cursor(items[-1].id)
+    return items, next_cursor
+
+
+def capped_count(query, cap: int):
+    id_column = query.selected_columns.id
+    matches = query.with_only_columns(id_column).order_by(None).limit(cap + 1)
+    return select(func.count()).select_from(matches.subquery()).scalar_subquery()
+
+
+async def estimate_count(session, query):
+    if session.bind.dialect.name != 'postgresql':
+        return None
+    statement = query.order_by(None).compile(
+        session.bind, compile_kwargs={'literal_binds': True}
+    )
+    plan = await session.scalar(text(f'EXPLAIN (FORMAT JSON) {statement}'))
+    if isinstance(plan, str):
+        plan = orjson.loads(plan)
+    return plan[0]['Plan']['Plan Rows']
@@ -0,0 +1,130 @@
+import logging
+from collections import Counter as StatementCounter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from curso_fastapi.metrics import Counter
+from curso_fastapi.settings import settings
+
+logger = logging.getLogger('curso_fastapi.requests')
+
+query_budget_exceeded_total = Counter(
+    'http_query_budget_exceeded_total',
+    'Requests that ran more SQL statements than the query budget',
+)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started_at = perf_counter()
+        self.phases = {}
+        self.statements = StatementCounter()
+        self.sql_seconds = 0.0
+
+    @property
+    def queries(self):
+        return self.statements.total()
+
+    @property
+    def elapsed(self):
+        return perf_counter() - self.started_at
+
+    def server_timing(self):
+        metrics = [
+            f'total;dur={self.elapsed * 1000:.2f}',
+            f'db;dur={self.sql_seconds * 1000:.2f};desc="{self.queries} queries"',
+        ]
+        metrics += [
+            f'{name};dur={seconds * 1000:.2f}' for name, seconds in self.phases.items()
+        ]
+        return ', '.join(metrics)
+
+
+current_profile: ContextVar[RequestProfile | None] = ContextVar(
+    'current_profile', default=None
+)
+
+
+@contextmanager
+def phase(name: str):
+    profile = current_profile.get()
+    started_at = perf_counter()
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.phases[name] = (
+                profile.phases.get(name, 0.0) + perf_counter() - started_at
+            )
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def receive_before_cursor_execute(conn, cursor, statement, *args):
+    conn.info['query_started_at'] = perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def receive_after_cursor_execute(conn, cursor, statement, *args):
+    started_at = conn.info.pop('query_started_at', None)
+    profile = current_profile.get()
+    if profile is not None and started_at is not None:
+        profile.sql_seconds += perf_counter() - started_at
+        profile.statements[statement] += 1
+
+
+def log_request(scope, status_code, profile: RequestProfile):
+    record = {
+        'method': scope['method'],
+        'path': scope['path'],
+        'status': status_code,
+        'duration_ms': round(profile.elapsed * 1000, 2),
+        'queries': profile.queries,
+        'sql_ms': round(profile.sql_seconds * 1000, 2),
+        'phases_ms': {
+            name: round(seconds * 1000, 2) for name, seconds in profile.phases.items()
+        },
+    }
+    if profile.queries > settings.QUERY_BUDGET:
+        query_budget_exceeded_total.inc()
+        statement, count = profile.statements.most_common(1)[0]
+        record['query_budget'] = settings.QUERY_BUDGET
+        record['most_repeated_statement'] = {'statement': statement, 'count': count}
+        logger.warning(orjson.dumps(record).decode())
+    else:
+        logger.info(orjson.dumps(record).decode())
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                if settings.SERVER_TIMING:
+                    message['headers'] = [
+                        *message.get('headers', []),
+                        (b'server-timing', profile.server_timing().encode()),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_profile.reset(token)
+            log_request(scope, status_code, profile)
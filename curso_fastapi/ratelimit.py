@@ -0,0 +1,105 @@
+from collections import OrderedDict
+from http import HTTPStatus
+from math import ceil
+from time import monotonic
+from typing import Annotated, Protocol
+
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import OAuth2PasswordRequestForm
+
+from curso_fastapi.cache import load_backend
+from curso_fastapi.metrics import Counter
+from curso_fastapi.models import User
+from curso_fastapi.security import get_current_user
+from curso_fastapi.settings import settings
+
+rate_limited_total = Counter(
+    'rate_limited_total', 'Requests rejected by the rate limiter', labelnames=('scope',)
+)
+
+
+class RateLimitBackend(Protocol):
+    def hit(self, key: str, capacity: int, refill_per_second: float) -> float: ...
+
+    def clear(self): ...
+
+
+class MemoryBackend:
+    def __init__(self, maxsize=100_000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+
+    def hit(self, key, capacity, refill_per_second):
+        now = monotonic()
+        tokens, updated_at = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / refill_per_second
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    def clear(self):
+        self._buckets.clear()
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend, enabled=True):
+        self.backend = backend
+        self.enabled = enabled
+
+    def check(self, scope: str, key: str, limit: int):
+        if not self.enabled or limit <= 0:
+            return
+
+        retry_after = self.backend.hit(
+            f'{scope}:{key}', limit, limit / settings.RATE_LIMIT_PERIOD_SECONDS
+        )
+        if retry_after > 0:
+            rate_limited_total.labels(scope).inc()
+            raise HTTPException(
+                status_code=HTTPStatus.TOO_MANY_REQUESTS,
+                detail='Too many requests, try again later',
+                headers={'Retry-After': str(ceil(retry_after))},
+            )
+
+    def clear(self):
+        self.backend.clear()
+
+
+rate_limiter = RateLimiter(
+    load_backend(settings.RATE_LIMIT_BACKEND)
+    if settings.RATE_LIMIT_BACKEND
+    else MemoryBackend(),
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
+
+
+def client_ip(request: Request):
+    return request.client.host if request.client else 'unknown'
+
+
+async def limit_login(
+    request: Request, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
+):
+    rate_limiter.check('login', client_ip(request), settings.LOGIN_RATE_LIMIT_PER_IP)
+    rate_limiter.check(
+        'login-username', form_data.username, settings.LOGIN_RATE_LIMIT_PER_USERNAME
+    )
+
+
+async def limit_signup(request: Request):
+    rate_limiter.check('signup', client_ip(request), settings.SIGNUP_RATE_LIMIT_PER_IP)
+
+
+async def limit_task_writes(current_user: Annotated[User, Depends(get_current_user)]):
+    rate_limiter.check(
+        'task-writes', current_user.username, settings.TASK_WRITES_RATE_LIMIT_PER_USER
+    )
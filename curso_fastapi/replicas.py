@@ -0,0 +1,144 @@
+import asyncio
+import logging
+from time import time
+from typing import Annotated
+
+from fastapi import Depends, Request
+from fastapi.security.utils import get_authorization_scheme_param
+from jwt.exceptions import PyJWTError
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from curso_fastapi.cache import TTLCache, load_backend
+from curso_fastapi.database import create_engine, engine
+from curso_fastapi.metrics import Counter, Gauge
+from curso_fastapi.models import User
+from curso_fastapi.security import decode_token, get_current_user
+from curso_fastapi.settings import settings
+
+logger = logging.getLogger('curso_fastapi.replicas')
+
+read_sessions_total = Counter(
+    'db_read_sessions_total',
+    'Read-only sessions by the database they were routed to',
+    labelnames=('target',),
+)
+
+
+class ReplicaSet:
+    def __init__(self, primary, replicas=()):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.healthy = dict.fromkeys(self.replicas, True)
+        self._next = 0
+
+    def candidates(self):
+        # Round-robin over healthy replicas, always ending with the primary.
+        count = len(self.replicas)
+        start, self._next = self._next, (self._next + 1) % max(count, 1)
+        for offset in range(count):
+            replica = self.replicas[(start + offset) % count]
+            if self.healthy[replica]:
+                yield replica
+        yield self.primary
+
+    def mark_down(self, replica):
+        if self.healthy.get(replica):
+            logger.warning('Replica %s is unavailable', replica.url)
+            self.healthy[replica] = False
+
+    async def check(self, replica, timeout):
+        try:
+            async with asyncio.timeout(timeout), replica.connect() as conn:
+                await conn.execute(text('SELECT 1'))
+        except (DBAPIError, OSError, TimeoutError):
+            self.mark_down(replica)
+            return False
+
+        if not self.healthy[replica]:
+            logger.info('Replica %s is back', replica.url)
+        self.healthy[replica] = True
+        return True
+
+    async def check_all(self, timeout):
+        await asyncio.gather(
+            *(self.check(replica, timeout) for replica in self.replicas)
+        )
+
+
+replica_set = ReplicaSet(
+    engine, [create_engine(url) for url in settings.DATABASE_REPLICA_URLS]
+)
+Gauge(
+    'db_replicas_healthy',
+    'Read replicas currently accepting reads',
+    function=lambda: sum(replica_set.healthy.values()),
+)
+
+# Usernames that wrote recently; their reads stay on the primary until the
+# replicas have had time to catch up. With a shared cache backend every worker
+# sees the marker, not just the one that handled the write.
+recent_writers = (
+    load_backend(settings.TASKS_CACHE_BACKEND)
+    if settings.TASKS_CACHE_BACKEND
+    else TTLCache(maxsize=100_000, ttl=settings.READ_YOUR_WRITES_SECONDS)
+)
+
+
+def writer_key(username: str):
+    return f'recent-writers:{username}'
+
+
+def mark_writer(username: str):
+    recent_writers.set(
+        writer_key(username), True, time() + settings.READ_YOUR_WRITES_SECONDS
+    )
+
+
+def request_username(request: Request):
+    scheme, token = get_authorization_scheme_param(request.headers.get('Authorization'))
+    if scheme.lower() != 'bearer':
+        return None
+    try:
+        return decode_token(token).get('sub')
+    except PyJWTError:
+        return None
+
+
+async def stick_to_primary(current_user: Annotated[User, Depends(get_current_user)]):
+    # Marked before the write so a read sent right after it cannot reach a
+    # replica, and again afterwards so the window starts at the commit.
+    mark_writer(current_user.username)
+    yield
+    mark_writer(current_user.username)
+
+
+async def get_read_session(request: Request):
+    username = request_username(request)
+    sticky = (
+        username is not None and recent_writers.get(writer_key(username)) is not None
+    )
+    candidates = [replica_set.primary] if sticky else replica_set.candidates()
+
+    for bind in candidates:
+        session = AsyncSession(bind, expire_on_commit=False)
+        if bind is not replica_set.primary:
+            try:
+                await session.connection()
+            except (DBAPIError, OSError):
+                await session.close()
+                replica_set.mark_down(bind)
+                continue
+
+        target = 'primary' if bind is replica_set.primary else 'replica'
+        read_sessions_total.labels(target).inc()
+        async with session:
+            yield session
+        return
+
+
+async def run_health_checks(interval, timeout):
+    while True:
+        await replica_set.check_all(timeout)
+        await asyncio.sleep(interval)
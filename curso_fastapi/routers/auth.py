@@ -4,37 +4,49 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from curso_fastapi.database import get_session
+from curso_fastapi.hashing import hashing_pool, verify_password
 from curso_fastapi.models import User
+from curso_fastapi.ratelimit import limit_login
 from curso_fastapi.schemas import Token
 from curso_fastapi.security import (
+    auth_failures_total,
     create_access_token,
     get_current_user,
-    verify_password,
 )
 
 auth_router = APIRouter(
     prefix='/auth',
     tags=['auth'],
 )
-T_Session = Annotated[Session, Depends(get_session)]
+T_Session = Annotated[AsyncSession, Depends(get_session)]
 T_OAuth2Form = Annotated[OAuth2PasswordRequestForm, Depends()]
 T_CurrentUser = Annotated[User, Depends(get_current_user)]
 
 
-@auth_router.post('/token/', response_model=Token)
-def login_for_access_token(form_data: T_OAuth2Form, session: T_Session):
-    user = session.scalar(select(User).where(User.username == form_data.username))
+@auth_router.post(
+    '/token/',
+    response_model=Token,
+    dependencies=[Depends(limit_login)],
+)
+async def login_for_access_token(form_data: T_OAuth2Form, session: T_Session):
+    user = await session.scalar(
+        select(User).where(
+            User.username == form_data.username, User.deleted_at.is_(None)
+        )
+    )
 
     if not user:
+        auth_failures_total.labels('bad_credentials').inc()
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail='Incorrect username or password',
         )
 
-    if not verify_password(form_data.password, user.password):
+    if not await hashing_pool.run(verify_password, form_data.password, user.password):
+        auth_failures_total.labels('bad_credentials').inc()
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail='Incorrect username or password',
@@ -46,7 +58,7 @@ def login_for_access_token(form_data: T_OAuth2Form, session: T_Session):
 
 
 @auth_router.post('/token/refresh/', response_model=Token)
-def refresh_token(session: T_Session, current_user: T_CurrentUser):
+async def refresh_token(current_user: T_CurrentUser):
     new_acess_token = create_access_token(data={'sub': current_user.username})
 
     return {'access_token': new_acess_token, 'token_type': 'Bearer'}
@@ -1,51 +1,286 @@
-from typing import Annotated
+from datetime import datetime, time, timedelta
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import delete, func, insert, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql.expression import select
+from zoneinfo import ZoneInfo
 
+from curso_fastapi.cache import ResultCache, TTLCache, load_backend
 from curso_fastapi.database import get_session
-from curso_fastapi.models import Task, User
-from curso_fastapi.schemas import (ListTasks, TaskCreate, TaskFilter, TaskResponse,
-                                      TaskUpdate)
+from curso_fastapi.etag import cache_headers, etag_matches, make_etag, not_modified
+from curso_fastapi.export import MEDIA_TYPES, stream_rows
+from curso_fastapi.metrics import Counter, Gauge
+from curso_fastapi.models import (
+    ArchivedTask,
+    Task,
+    TaskState,
+    TaskStateCount,
+    TaskVersion,
+    User,
+)
+from curso_fastapi.pagination import capped_count, estimate_count, paginate
+from curso_fastapi.profiling import phase
+from curso_fastapi.ratelimit import limit_task_writes
+from curso_fastapi.replicas import get_read_session, stick_to_primary
+from curso_fastapi.schemas import (
+    ListTasks,
+    TaskBulkCreate,
+    TaskBulkDelete,
+    TaskBulkResults,
+    TaskBulkUpdate,
+    TaskCreate,
+    TaskFilter,
+    TaskResponse,
+    TaskStats,
+    TaskUpdate,
+    columns_for,
+    list_tasks_adapter,
+)
+from curso_fastapi.search import search_tasks
 from curso_fastapi.security import get_current_user
+from curso_fastapi.settings import settings
 
 tasks_router = APIRouter(
     prefix='/tasks',
     tags=['tasks'],
 )
 
-T_Session = Annotated[Session, Depends(get_session)]
+T_Session = Annotated[AsyncSession, Depends(get_session)]
+T_ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
 T_Current_User = Annotated[User, Depends(get_current_user)]
 T_Filter = Annotated[TaskFilter, Depends()]
+WRITE_DEPENDENCIES = [Depends(limit_task_writes), Depends(stick_to_primary)]
+
+TASK_COLUMNS = columns_for(Task, TaskResponse)
+ARCHIVED_TASK_COLUMNS = columns_for(ArchivedTask, TaskResponse)
+
+tasks_cache = ResultCache(
+    load_backend(settings.TASKS_CACHE_BACKEND)
+    if settings.TASKS_CACHE_BACKEND
+    else TTLCache(
+        maxsize=settings.TASKS_CACHE_MAXSIZE, ttl=settings.TASKS_CACHE_TTL_SECONDS
+    ),
+    namespace='tasks',
+    shared=bool(settings.TASKS_CACHE_BACKEND),
+)
+Counter(
+    'tasks_cache_hits_total',
+    'Task list pages served from the result cache',
+    function=lambda: tasks_cache.hits,
+)
+Counter(
+    'tasks_cache_misses_total',
+    'Task list pages that had to be queried',
+    function=lambda: tasks_cache.misses,
+)
+Gauge(
+    'tasks_cache_hit_ratio',
+    'Share of task list lookups served from the result cache',
+    function=lambda: tasks_cache.hit_ratio,
+)
+
+
+def filter_tasks(query, filters: TaskFilter, model=Task):
+    if filters.title:
+        query = query.filter(model.title.contains(filters.title))
+    if filters.description:
+        query = query.filter(model.description.contains(filters.description))
+    if filters.state:
+        query = query.filter(model.state == filters.state)
+    return query
+
+
+def select_tasks(user_id: int, filters: TaskFilter):
+    query = filter_tasks(select(*TASK_COLUMNS).filter(Task.user_id == user_id), filters)
+    if not filters.include_archived:
+        return query
+
+    archived = filter_tasks(
+        select(*ARCHIVED_TASK_COLUMNS).filter(ArchivedTask.user_id == user_id),
+        filters,
+        ArchivedTask,
+    )
+    return select(union_all(query, archived).subquery())
+
+
+async def tasks_version(session, user_id: int):
+    version = await session.scalar(
+        select(TaskVersion.version).where(TaskVersion.user_id == user_id)
+    )
+    return version or 0
+
+
+async def count_tasks(session, query, capped_total):
+    threshold = settings.TASKS_TOTAL_EXACT_THRESHOLD
+    if capped_total <= threshold:
+        return {'total': capped_total, 'total_exact': True}
+
+    estimate = await estimate_count(session, query)
+    return {'total': max(estimate or 0, capped_total), 'total_exact': False}
+
+
+def query_tasks(session, user_id: int, filters: TaskFilter):
+    if filters.q and filters.include_archived:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Search does not cover archived tasks',
+        )
+
+    query = select_tasks(user_id, filters)
+    if filters.q:
+        query = search_tasks(query, filters.q, session.bind.dialect.name)
+    return query
+
+
+async def load_tasks_page(session, user_id: int, filters: TaskFilter):
+    query = query_tasks(session, user_id, filters)
+
+    page_query = query
+    if filters.include_total:
+        total = capped_count(query, settings.TASKS_TOTAL_EXACT_THRESHOLD)
+        page_query = query.add_columns(total.label('total'))
+
+    # Search results are ranked, so they page by offset and carry no cursor.
+    cursor = None if filters.q else filters.cursor
+    tasks, next_cursor = await paginate(
+        session, page_query, filters.limit, filters.offset, cursor
+    )
+    page = {
+        'tasks': [task._asdict() for task in tasks],
+        'next_cursor': None if filters.q else next_cursor,
+    }
+
+    if filters.include_total:
+        capped_total = (
+            page['tasks'][0]['total'] if tasks else await session.scalar(select(total))
+        )
+        for task in page['tasks']:
+            del task['total']
+        page.update(await count_tasks(session, query, capped_total))
+    return page
 
 
 @tasks_router.get('/', response_model=ListTasks)
-def list_tasks(
-    session: T_Session,
+async def list_tasks(
+    request: Request,
+    session: T_ReadSession,
     current_user: T_Current_User,
     filters: T_Filter,
 ):
-    query = select(Task).filter(Task.user_id == current_user.id)
-    if filters.title:
-        query = query.filter(Task.title.contains(filters.title))
-    if filters.description:
-        query = query.filter(Task.description.contains(filters.description))
-    if filters.state:
-        query = query.filter(Task.state == filters.state)
-    tasks = (
-        session.execute(query.offset(filters.offset).limit(filters.limit))
-        .scalars()
-        .all()
+    cache_key = tasks_cache.key(
+        current_user.id, make_etag(filters.model_dump()).strip('"')
     )
+    etag, body = tasks_cache.get(cache_key) or (None, None)
+    # Writes bump the owner's generation in the cache backend. A shared backend
+    # sees every worker's writes, so its entries are trusted without a query; a
+    # per-process cache only sees its own, so hits are checked against the
+    # task version row.
+    if etag is None or not tasks_cache.shared:
+        current_etag = make_etag(
+            current_user.id,
+            await tasks_version(session, current_user.id),
+            filters.model_dump(),
+        )
+        if current_etag != etag:
+            etag, body = current_etag, None
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    if body is None:
+        page = await load_tasks_page(session, current_user.id, filters)
+        with phase('serialize'):
+            body = list_tasks_adapter.dump_json(
+                list_tasks_adapter.validate_python(page), exclude_unset=True
+            )
+        tasks_cache.set(cache_key, (etag, body))
 
-    return {'tasks': tasks}
+    return Response(body, media_type='application/json', headers=cache_headers(etag))
+
+
+@tasks_router.get('/export')
+async def export_tasks(
+    session: T_ReadSession,
+    current_user: T_Current_User,
+    filters: T_Filter,
+    export_format: Annotated[Literal['ndjson', 'csv'], Query(alias='format')] = (
+        'ndjson'
+    ),
+):
+    query = query_tasks(session, current_user.id, filters)
+
+    return StreamingResponse(
+        stream_rows(
+            session.bind,
+            query.order_by(query.selected_columns.id),
+            export_format,
+            settings.TASKS_EXPORT_BATCH_SIZE,
+        ),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            'Content-Disposition': f'attachment; filename="tasks.{export_format}"'
+        },
+    )
+
+
+async def count_tasks_by_state(session, user_id: int):
+    if settings.TASKS_STATS_FROM_COUNTERS:
+        query = select(TaskStateCount.state, TaskStateCount.count).where(
+            TaskStateCount.user_id == user_id
+        )
+    else:
+        query = (
+            select(Task.state, func.count())
+            .where(Task.user_id == user_id)
+            .group_by(Task.state)
+        )
+    counts = dict.fromkeys(TaskState, 0)
+    counts.update((await session.execute(query)).all())
+    return counts
+
+
+async def count_tasks_per_day(session, user_id: int, column, since):
+    day_column = func.date(column)
+    rows = await session.execute(
+        select(day_column, func.count())
+        .where(Task.user_id == user_id, column >= since)
+        .group_by(day_column)
+        .order_by(day_column)
+    )
+    return [{'day': day, 'count': count} for day, count in rows]
+
+
+@tasks_router.get('/stats', response_model=TaskStats)
+async def task_stats(
+    session: T_ReadSession,
+    current_user: T_Current_User,
+    days: Annotated[int | None, Query(ge=1, le=366)] = None,
+):
+    states = await count_tasks_by_state(session, current_user.id)
+    stats = {'total': sum(states.values()), 'states': states}
+    if days:
+        today = datetime.now(tz=ZoneInfo('UTC')).date()
+        since = datetime.combine(today - timedelta(days=days - 1), time.min)
+        stats['created_per_day'] = await count_tasks_per_day(
+            session, current_user.id, Task.created_at, since
+        )
+        stats['updated_per_day'] = await count_tasks_per_day(
+            session, current_user.id, Task.updated_at, since
+        )
+    return stats
 
 
 @tasks_router.post(
-    '/', response_model=TaskResponse, status_code=status.HTTP_201_CREATED
+    '/',
+    response_model=TaskResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=WRITE_DEPENDENCIES,
 )
-def create_task(task: TaskCreate, session: T_Session, current_user: T_Current_User):
+async def create_task(
+    task: TaskCreate, session: T_Session, current_user: T_Current_User
+):
     new_task = Task(
         title=task.title,
         description=task.description,
@@ -53,49 +288,210 @@ def create_task(task: TaskCreate, session: T_Session, current_user: T_Current_Us
         user_id=current_user.id,
     )
     session.add(new_task)
-    session.commit()
-    session.refresh(new_task)
+    await session.commit()
+    tasks_cache.invalidate(current_user.id)
 
     return new_task
 
 
+def check_batch_size(size: int):
+    if size > settings.TASKS_BULK_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f'Batches are limited to {settings.TASKS_BULK_MAX_SIZE} tasks',
+        )
+
+
+def delete_tasks(permanent: bool):
+    if permanent:
+        return delete(Task)
+    return update(Task).values(state=TaskState.TRASH)
+
+
+async def bulk_results(session, task_ids, done, done_status):
+    missing = [task_id for task_id in task_ids if task_id not in done]
+    existing = set()
+    if missing:
+        existing = set(
+            await session.scalars(select(Task.id).where(Task.id.in_(missing)))
+        )
+
+    results = []
+    for task_id in task_ids:
+        if task_id in done:
+            task_status = done_status
+        elif task_id in existing:
+            task_status = status.HTTP_403_FORBIDDEN
+        else:
+            task_status = status.HTTP_404_NOT_FOUND
+        results.append({'id': task_id, 'status': task_status})
+    return {'results': results}
+
+
+@tasks_router.post(
+    '/bulk',
+    response_model=TaskBulkResults,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=WRITE_DEPENDENCIES,
+)
+async def create_tasks_bulk(
+    payload: TaskBulkCreate, session: T_Session, current_user: T_Current_User
+):
+    check_batch_size(len(payload.tasks))
+
+    # PostgreSQL guarantees neither the order of RETURNING rows nor of the ids
+    # a multi-row INSERT takes from the sequence, so SQLAlchemy matches rows
+    # back to their parameters there. SQLite assigns rowids in VALUES order
+    # within the single statement, where sorting by id restores request order.
+    in_request_order = session.bind.dialect.name == 'postgresql'
+    new_tasks = (
+        await session.scalars(
+            insert(Task).returning(Task, sort_by_parameter_order=in_request_order),
+            [
+                {**task.model_dump(), 'user_id': current_user.id}
+                for task in payload.tasks
+            ],
+        )
+    ).all()
+    if not in_request_order:
+        new_tasks.sort(key=lambda task: task.id)
+    results = [
+        {'id': task.id, 'status': status.HTTP_201_CREATED, 'task': task}
+        for task in new_tasks
+    ]
+    await session.commit()
+    tasks_cache.invalidate(current_user.id)
+
+    return {'results': results}
+
+
+@tasks_router.patch(
+    '/bulk', response_model=TaskBulkResults, dependencies=WRITE_DEPENDENCIES
+)
+async def update_tasks_bulk(
+    payload: TaskBulkUpdate, session: T_Session, current_user: T_Current_User
+):
+    check_batch_size(len(payload.tasks))
+
+    task_ids = [item.id for item in payload.tasks]
+    owned = set(
+        await session.scalars(
+            select(Task.id).where(
+                Task.id.in_(task_ids), Task.user_id == current_user.id
+            )
+        )
+    )
+    values = [
+        item.model_dump(exclude_unset=True)
+        for item in payload.tasks
+        if item.id in owned
+    ]
+    if values:
+        await session.execute(update(Task), values)
+        await session.commit()
+        tasks_cache.invalidate(current_user.id)
+
+    return await bulk_results(session, task_ids, owned, status.HTTP_200_OK)
+
+
+@tasks_router.delete(
+    '/bulk', response_model=TaskBulkResults, dependencies=WRITE_DEPENDENCIES
+)
+async def delete_tasks_bulk(
+    payload: TaskBulkDelete,
+    session: T_Session,
+    current_user: T_Current_User,
+    permanent: bool = False,
+):
+    check_batch_size(len(payload.ids))
+
+    deleted = set(
+        await session.scalars(
+            delete_tasks(permanent)
+            .where(Task.id.in_(payload.ids), Task.user_id == current_user.id)
+            .returning(Task.id)
+        )
+    )
+    await session.commit()
+    tasks_cache.invalidate(current_user.id)
+
+    return await bulk_results(session, payload.ids, deleted, status.HTTP_204_NO_CONTENT)
+
+
+async def raise_for_missing_task(session, task_id: int):
+    if await session.scalar(select(Task.id).where(Task.id == task_id)) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail='Task not found'
+        )
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN, detail='Not enough permissions'
+    )
+
+
 @tasks_router.get('/{task_id}', response_model=TaskResponse)
-def get_task(task_id: int, session: T_Session, current_user: T_Current_User):
-    task = session.get(Task, task_id)
+async def get_task(
+    request: Request,
+    task_id: int,
+    session: T_ReadSession,
+    current_user: T_Current_User,
+):
+    task = (
+        await session.execute(
+            select(*TASK_COLUMNS).where(
+                Task.id == task_id, Task.user_id == current_user.id
+            )
+        )
+    ).one_or_none()
     if task is None:
-        return status.HTTP_404_NOT_FOUND
-    if task.user_id != current_user.id:
-        return status.HTTP_403_FORBIDDEN
+        await raise_for_missing_task(session, task_id)
+
+    etag = make_etag(*task)
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
-    return task
+    return ORJSONResponse(task._asdict(), headers=cache_headers(etag))
 
 
-@tasks_router.patch('/{task_id}', response_model=TaskResponse)
-def update_task(
+@tasks_router.patch(
+    '/{task_id}', response_model=TaskResponse, dependencies=WRITE_DEPENDENCIES
+)
+async def update_task(
     task_id: int, task: TaskUpdate, session: T_Session, current_user: T_Current_User
 ):
-    db_task = session.get(Task, task_id)
+    owned_task = (Task.id == task_id, Task.user_id == current_user.id)
+    values = task.model_dump(exclude_unset=True)
+    if values:
+        db_task = await session.scalar(
+            update(Task).where(*owned_task).values(**values).returning(Task)
+        )
+    else:
+        db_task = await session.scalar(select(Task).where(*owned_task))
     if db_task is None:
-        return status.HTTP_404_NOT_FOUND
-    if db_task.user_id != current_user.id:
-        return status.HTTP_403_FORBIDDEN
-
-    for field, value in task.model_dump(exclude_unset=True).items():
-        setattr(db_task, field, value)
-    session.commit()
-    session.refresh(db_task)
+        await raise_for_missing_task(session, task_id)
+    await session.commit()
+    tasks_cache.invalidate(current_user.id)
 
     return db_task
 
 
-@tasks_router.delete('/{task_id}', status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(task_id: int, session: T_Session, current_user: T_Current_User):
-    task = session.get(Task, task_id)
-    if task is None:
-        return status.HTTP_404_NOT_FOUND
-    if task.user_id != current_user.id:
-        return status.HTTP_403_FORBIDDEN
-
-    session.delete(task)
-    session.commit()
+@tasks_router.delete(
+    '/{task_id}',
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=WRITE_DEPENDENCIES,
+)
+async def delete_task(
+    task_id: int,
+    session: T_Session,
+    current_user: T_Current_User,
+    permanent: bool = False,
+):
+    deleted = await session.scalar(
+        delete_tasks(permanent)
+        .where(Task.id == task_id, Task.user_id == current_user.id)
+        .returning(Task.id)
+    )
+    if deleted is None:
+        await raise_for_missing_task(session, task_id)
+    await session.commit()
+    tasks_cache.invalidate(current_user.id)
     return status.HTTP_204_NO_CONTENT
@@ -1,40 +1,86 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse, Response
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from curso_fastapi.database import get_session
-from curso_fastapi.models import User
-from curso_fastapi.schemas import UserCreate, UserList, UserResponse
-from curso_fastapi.security import get_current_user, get_password_hash
+from curso_fastapi.etag import cache_headers, etag_matches, make_etag, not_modified
+from curso_fastapi.hashing import get_password_hash, hashing_pool
+from curso_fastapi.jobs import job_queue
+from curso_fastapi.models import ArchivedTask, Task, TaskStateCount, TaskVersion, User
+from curso_fastapi.pagination import paginate
+from curso_fastapi.ratelimit import limit_signup
+from curso_fastapi.replicas import get_read_session, stick_to_primary
+from curso_fastapi.schemas import (
+    UserCreate,
+    UserList,
+    UserResponse,
+    columns_for,
+    user_list_adapter,
+)
+from curso_fastapi.security import get_current_user, user_cache
+from curso_fastapi.settings import settings
 
 user_router = APIRouter(
     prefix='/users',
     tags=['users'],
 )
-T_Session = Annotated[Session, Depends(get_session)]
+T_Session = Annotated[AsyncSession, Depends(get_session)]
+T_ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
 T_CurrentUser = Annotated[User, Depends(get_current_user)]
 
+USER_COLUMNS = columns_for(User, UserResponse)
+
 
 @user_router.get('/', response_model=UserList, status_code=HTTPStatus.OK)
-def list_users(session: T_Session, limit: int = 10, offset: int = 0):
-    users = session.execute(select(User).limit(limit).offset(offset)).scalars().all()
-    return {'users': users}
+async def list_users(
+    session: T_ReadSession,
+    limit: Annotated[int, Query(ge=0)] = 10,
+    offset: Annotated[int, Query(ge=0)] = 0,
+    cursor: str | None = None,
+):
+    users, next_cursor = await paginate(
+        session,
+        select(*USER_COLUMNS).where(User.deleted_at.is_(None)),
+        limit,
+        offset,
+        cursor,
+    )
+    page = user_list_adapter.validate_python({
+        'users': [user._asdict() for user in users],
+        'next_cursor': next_cursor,
+    })
+    return Response(user_list_adapter.dump_json(page), media_type='application/json')
 
 
 @user_router.get('/{user_id}', response_model=UserResponse, status_code=HTTPStatus.OK)
-def read_user(session: T_Session, user_id: int):
-    user = session.get(User, user_id)
+async def read_user(request: Request, session: T_ReadSession, user_id: int):
+    user = (
+        await session.execute(
+            select(*USER_COLUMNS).where(User.id == user_id, User.deleted_at.is_(None))
+        )
+    ).one_or_none()
     if not user:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='User not found')
-    return user
+
+    etag = make_etag(*user)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    return ORJSONResponse(user._asdict(), headers=cache_headers(etag))
 
 
-@user_router.post('/', status_code=HTTPStatus.CREATED, response_model=UserResponse)
-def create_user(user: UserCreate, session: T_Session):
-    db_user = session.scalar(
+@user_router.post(
+    '/',
+    status_code=HTTPStatus.CREATED,
+    response_model=UserResponse,
+    dependencies=[Depends(limit_signup)],
+)
+async def create_user(user: UserCreate, session: T_Session):
+    db_user = await session.scalar(
         select(User).where(
             (User.email == user.email) | (User.username == user.username)
         )
@@ -49,18 +95,22 @@ def create_user(user: UserCreate, session: T_Session):
                 status_code=HTTPStatus.CONFLICT, detail='Email already exists'
             )
 
-    user.password = get_password_hash(user.password)
+    user.password = await hashing_pool.run(get_password_hash, user.password)
 
     new_user = User(**user.model_dump())
     session.add(new_user)
-    session.commit()
-    session.refresh(new_user)
+    await session.commit()
 
     return new_user
 
 
-@user_router.put('/{user_id}', response_model=UserResponse, status_code=HTTPStatus.OK)
-def update_user(
+@user_router.put(
+    '/{user_id}',
+    response_model=UserResponse,
+    status_code=HTTPStatus.OK,
+    dependencies=[Depends(stick_to_primary)],
+)
+async def update_user(
     user_id: int,
     user: UserCreate,
     session: T_Session,
@@ -71,18 +121,23 @@ def update_user(
             status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions'
         )
 
+    old_username = current_user.username
     current_user.username = user.username
     current_user.email = user.email
-    current_user.password = get_password_hash(user.password)
+    current_user.password = await hashing_pool.run(get_password_hash, user.password)
 
-    session.commit()
-    session.refresh(current_user)
+    await session.commit()
+    user_cache.delete(old_username)
 
     return current_user
 
 
-@user_router.delete('/{user_id}', status_code=HTTPStatus.NO_CONTENT)
-def delete_user(
+@user_router.delete(
+    '/{user_id}',
+    status_code=HTTPStatus.NO_CONTENT,
+    dependencies=[Depends(stick_to_primary)],
+)
+async def delete_user(
     user_id: int,
     session: T_Session,
     current_user: T_CurrentUser,
@@ -92,5 +147,33 @@ def delete_user(
             status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions'
         )
 
-    session.delete(current_user)
-    session.commit()
+    current_user.deleted_at = func.now()
+    await session.commit()
+    user_cache.delete(current_user.username)
+    # Other workers may still authenticate the user from their own cache until
+    # the snapshot expires, so the rows stay in place until then.
+    await job_queue.enqueue(
+        'delete_user', delay=settings.USER_CACHE_TTL_SECONDS, user_id=user_id
+    )
+
+
+@job_queue.job('delete_user')
+async def purge_user(session: AsyncSession, user_id: int):
+    for model in (Task, ArchivedTask):
+        while True:
+            ids = (
+                await session.scalars(
+                    select(model.id)
+                    .where(model.user_id == user_id)
+                    .limit(settings.USER_DELETE_BATCH_SIZE)
+                )
+            ).all()
+            if not ids:
+                break
+            await session.execute(delete(model).where(model.id.in_(ids)))
+            await session.commit()
+
+    for model in (TaskStateCount, TaskVersion):
+        await session.execute(delete(model).where(model.user_id == user_id))
+    await session.execute(delete(User).where(User.id == user_id))
+    await session.commit()
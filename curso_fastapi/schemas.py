@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, TypeAdapter, field_validator
 
 from curso_fastapi.models import TaskState
 
@@ -24,6 +24,10 @@ class UserResponse(BaseModel):
 
 class UserList(BaseModel):
     users: list[UserResponse] = []
+    next_cursor: str | None = None
+
+
+user_list_adapter = TypeAdapter(UserList)
 
 
 class Token(BaseModel):
@@ -47,6 +51,12 @@ class TaskResponse(TaskCreate):
 
 class ListTasks(BaseModel):
     tasks: list[TaskResponse] = []
+    next_cursor: str | None = None
+    total: int | None = None
+    total_exact: bool | None = None
+
+
+list_tasks_adapter = TypeAdapter(ListTasks)
 
 
 class TaskUpdate(BaseModel):
@@ -55,9 +65,78 @@ class TaskUpdate(BaseModel):
     state: TaskState | None = None
 
 
+class TaskBulkCreate(BaseModel):
+    tasks: list[TaskCreate] = Field(min_length=1)
+
+
+class TaskBulkUpdateItem(TaskUpdate):
+    id: int
+
+
+def check_unique_ids(ids: list[int]):
+    if len(set(ids)) != len(ids):
+        raise ValueError('Task ids must be unique')
+
+
+class TaskBulkUpdate(BaseModel):
+    tasks: list[TaskBulkUpdateItem] = Field(min_length=1)
+
+    @field_validator('tasks')
+    @classmethod
+    def unique_ids(cls, tasks: list[TaskBulkUpdateItem]):
+        check_unique_ids([task.id for task in tasks])
+        return tasks
+
+
+class TaskBulkDelete(BaseModel):
+    ids: list[int] = Field(min_length=1)
+
+    @field_validator('ids')
+    @classmethod
+    def unique_ids(cls, ids: list[int]):
+        check_unique_ids(ids)
+        return ids
+
+
+class TaskBulkResult(BaseModel):
+    id: int
+    status: int
+    task: TaskResponse | None = None
+
+
+class TaskBulkResults(BaseModel):
+    results: list[TaskBulkResult]
+
+
 class TaskFilter(BaseModel):
     title: str | None = None
     description: str | None = None
     state: TaskState | None = None
-    offset: int = 0
-    limit: int = 10
+    q: str | None = None
+    offset: int = Field(0, ge=0)
+    limit: int = Field(10, ge=0)
+    cursor: str | None = None
+    include_total: bool = False
+    include_archived: bool = False
+
+    @field_validator('q')
+    @classmethod
+    def blank_search_is_no_search(cls, q: str | None):
+        return q.strip() or None if q else None
+
+
+class DayCount(BaseModel):
+    day: date
+    count: int
+
+
+class TaskStats(BaseModel):
+    total: int
+    states: dict[TaskState, int]
+    created_per_day: list[DayCount] | None = None
+    updated_per_day: list[DayCount] | None = None
+
+
+def columns_for(model, schema: type[BaseModel]):
+    fields = sorted(schema.model_fields, key=lambda field: field != 'id')
+    return tuple(getattr(model, field) for field in fields)
@@ -0,0 +1,21 @@
+from sqlalchemy import column, func, literal_column, table
+
+from curso_fastapi.models import Task
+
+tasks_fts = table('tasks_fts', column('rowid'), column('rank'))
+
+
+def search_tasks(query, q: str, dialect_name: str):
+    if dialect_name == 'postgresql':
+        search_vector = literal_column('tasks.search_vector')
+        ts_query = func.websearch_to_tsquery('simple', q)
+        return query.filter(search_vector.op('@@')(ts_query)).order_by(
+            func.ts_rank(search_vector, ts_query).desc()
+        )
+
+    match = ' '.join('"{}"*'.format(term.replace('"', '""')) for term in q.split())
+    return (
+        query.join(tasks_fts, tasks_fts.c.rowid == Task.id)
+        .filter(literal_column('tasks_fts').match(match))
+        .order_by(tasks_fts.c.rank)
+    )
@@ -1,33 +1,57 @@
 from datetime import datetime, timedelta
+from hashlib import sha256
 from http import HTTPStatus
 
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jwt import decode, encode
 from jwt.exceptions import ExpiredSignatureError, PyJWTError
-from pwdlib import PasswordHash
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 from sqlalchemy.sql import select
 from zoneinfo import ZoneInfo
 
+from curso_fastapi.cache import TTLCache
 from curso_fastapi.database import get_session
+from curso_fastapi.metrics import Counter
 from curso_fastapi.models import User
+from curso_fastapi.profiling import phase
 from curso_fastapi.schemas import TokenData
-from curso_fastapi.settings import Settings
+from curso_fastapi.settings import settings
 
-pwd_context = PasswordHash.recommended()
-SECRET_KEY = Settings().SECRET_KEY
-ALGORITHM = Settings().ALGORITHM
-ACCESS_TOKEN_EXPIRE_MINUTES = Settings().ACCESS_TOKEN_EXPIRE_MINUTES
+SECRET_KEY = settings.SECRET_KEY
+ALGORITHM = settings.ALGORITHM
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
 
-
-def verify_password(plain_password, hashed_password):  # pragma: no cover
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password):  # pragma: no cover
-    return pwd_context.hash(password)
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_MAXSIZE)
+user_cache = TTLCache(
+    maxsize=settings.USER_CACHE_MAXSIZE, ttl=settings.USER_CACHE_TTL_SECONDS
+)
+Counter(
+    'token_cache_hits_total',
+    'Access tokens whose verified claims were served from cache',
+    function=lambda: token_cache.hits,
+)
+Counter(
+    'token_cache_misses_total',
+    'Access tokens that went through full signature verification',
+    function=lambda: token_cache.misses,
+)
+Counter(
+    'user_cache_hits_total',
+    'Authenticated user lookups served from cache',
+    function=lambda: user_cache.hits,
+)
+Counter(
+    'user_cache_misses_total',
+    'Authenticated user lookups that hit the database',
+    function=lambda: user_cache.misses,
+)
+auth_failures_total = Counter(
+    'auth_failures_total', 'Rejected authentication attempts', labelnames=('reason',)
+)
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -43,27 +67,74 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 
-def get_current_user(
-    session: Session = Depends(get_session),
-    token: str = Depends(oauth2_scheme),
-):
+def decode_token(token: str):
+    key = sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        if 'exp' in payload:
+            token_cache.set(key, payload, expires_at=payload['exp'])
+    return payload
+
+
+def cache_user(user: User):
+    user_cache.set(
+        user.username,
+        {column.key: getattr(user, column.key) for column in inspect(User).columns},
+    )
+
+
+def cached_user(snapshot: dict):
+    user = inspect(User).class_manager.new_instance()
+    for key, value in snapshot.items():
+        setattr(user, key, value)
+    make_transient_to_detached(user)
+    return user
+
+
+async def authenticate(session: AsyncSession, token: str):
     credentials_exception = HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail='Could not validate credentials',
         headers={'WWW-Authenticate': 'Bearer'},
     )
     try:
-        payload = decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         username: str = payload.get('sub')
         if username is None:
+            auth_failures_total.labels('invalid_token').inc()
             raise credentials_exception
         token_data = TokenData(username=username)
     except ExpiredSignatureError:
+        auth_failures_total.labels('expired_token').inc()
         raise credentials_exception
     except PyJWTError:
+        auth_failures_total.labels('invalid_token').inc()
         raise credentials_exception
 
-    user = session.scalar(select(User).filter(User.username == token_data.username))
+    snapshot = user_cache.get(token_data.username)
+    if snapshot is not None:
+        if snapshot['deleted_at'] is not None:
+            user_cache.delete(token_data.username)
+            auth_failures_total.labels('unknown_user').inc()
+            raise credentials_exception
+        return await session.merge(cached_user(snapshot), load=False)
+
+    user = await session.scalar(
+        select(User).filter(
+            User.username == token_data.username, User.deleted_at.is_(None)
+        )
+    )
     if user is None:
+        auth_failures_total.labels('unknown_user').inc()
         raise credentials_exception
+    cache_user(user)
     return user
+
+
+async def get_current_user(
+    session: AsyncSession = Depends(get_session),
+    token: str = Depends(oauth2_scheme),
+):
+    with phase('auth'):
+        return await authenticate(session, token)
@@ -1,4 +1,25 @@
+from functools import lru_cache
+from typing import Literal
+
+from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from sqlalchemy.engine import make_url
+
+# The engine is async, so every URL has to name an asyncio driver.
+ASYNC_DRIVERS = {'sqlite': 'aiosqlite', 'postgresql': 'asyncpg'}
+
+
+def async_database_url(url: str):
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        supported = ', '.join(
+            f'{name}+{driver}://' for name, driver in ASYNC_DRIVERS.items()
+        )
+        raise ValueError(f'Unsupported database {backend!r}; use one of {supported}')
+    return parsed.set(
+        drivername=f'{backend}+{ASYNC_DRIVERS[backend]}'
+    ).render_as_string(hide_password=False)
 
 
 class Settings(BaseSettings):
@@ -9,3 +30,69 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    DATABASE_POOL_CLASS: Literal['queue', 'static', 'null'] | None = None
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30.0
+    DATABASE_POOL_RECYCLE: int = -1
+    DATABASE_POOL_PRE_PING: bool = False
+    DATABASE_POOL_USE_LIFO: bool = False
+    METRICS_TOKEN: str | None = None
+    PASSWORD_HASH_EXECUTOR: Literal['thread', 'process'] = 'thread'
+    PASSWORD_HASH_WORKERS: int | None = None
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+    USER_CACHE_TTL_SECONDS: int = 5
+    USER_CACHE_MAXSIZE: int = 1024
+    TOKEN_CACHE_MAXSIZE: int = 4096
+    TASKS_BULK_MAX_SIZE: int = 1000
+    TASKS_EXPORT_BATCH_SIZE: int = 1000
+    CACHE_CONTROL: str = 'private, no-cache'
+    TASKS_CACHE_BACKEND: str | None = None
+    TASKS_CACHE_TTL_SECONDS: int = 30
+    TASKS_CACHE_MAXSIZE: int = 1024
+    SERVER_TIMING: bool = True
+    QUERY_BUDGET: int = 10
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str | None = None
+    LOGIN_RATE_LIMIT_PER_IP: int = 20
+    LOGIN_RATE_LIMIT_PER_USERNAME: int = 5
+    SIGNUP_RATE_LIMIT_PER_IP: int = 10
+    TASK_WRITES_RATE_LIMIT_PER_USER: int = 120
+    RATE_LIMIT_PERIOD_SECONDS: int = 60
+    TASKS_STATS_FROM_COUNTERS: bool = False
+    TASKS_TOTAL_EXACT_THRESHOLD: int = 10_000
+    ARCHIVE_ENABLED: bool = False
+    ARCHIVE_AFTER_DAYS: int = 30
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_INTERVAL_SECONDS: float = 300.0
+    JOBS_DATABASE_URL: str = 'sqlite+aiosqlite:///jobs.db'
+    JOBS_WORKERS: int = 2
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_RETRY_BACKOFF_SECONDS: float = 1.0
+    JOBS_LEASE_SECONDS: float = 60.0
+    USER_DELETE_BATCH_SIZE: int = 500
+    DATABASE_REPLICA_URLS: list[str] = []
+    DATABASE_REPLICA_HEALTH_CHECK_SECONDS: float = 5.0
+    DATABASE_REPLICA_HEALTH_CHECK_TIMEOUT: float = 1.0
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    @field_validator('DATABASE_URL', 'JOBS_DATABASE_URL')
+    @classmethod
+    def use_async_driver(cls, url: str):
+        return async_database_url(url)
+
+    @field_validator('DATABASE_REPLICA_URLS')
+    @classmethod
+    def use_async_drivers(cls, urls: list[str]):
+        return [async_database_url(url) for url in urls]
+
+
+@lru_cache
+def get_settings():
+    return Settings()
+
+
+settings = get_settings()
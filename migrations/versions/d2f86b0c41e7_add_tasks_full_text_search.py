@@ -0,0 +1,62 @@
+"""add tasks full text search
+
+Revision ID: d2f86b0c41e7
+Revises: 7c3e9a1d5b42
+Create Date: 2026-10-18 11:03:27.905116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f86b0c41e7'
+down_revision: Union[str, None] = '7c3e9a1d5b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_SEARCH_DDL = (
+    'CREATE VIRTUAL TABLE tasks_fts USING fts5('
+    "title, description, content='tasks', content_rowid='id')",
+    'CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN '
+    'INSERT INTO tasks_fts(rowid, title, description) '
+    'VALUES (new.id, new.title, new.description); END',
+    'CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN '
+    'INSERT INTO tasks_fts(tasks_fts, rowid, title, description) '
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    'CREATE TRIGGER tasks_fts_update AFTER UPDATE OF title, description ON tasks '
+    'BEGIN '
+    'INSERT INTO tasks_fts(tasks_fts, rowid, title, description) '
+    "VALUES ('delete', old.id, old.title, old.description); "
+    'INSERT INTO tasks_fts(rowid, title, description) '
+    'VALUES (new.id, new.title, new.description); END',
+)
+POSTGRESQL_SEARCH_DDL = (
+    'ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS '
+    "(to_tsvector('simple', title || ' ' || description)) STORED",
+    'CREATE INDEX ix_tasks_search_vector ON tasks USING gin (search_vector)',
+)
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_SEARCH_DDL:
+            op.execute(statement)
+        op.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        for statement in POSTGRESQL_SEARCH_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS tasks_fts_update')
+        op.execute('DROP TRIGGER IF EXISTS tasks_fts_delete')
+        op.execute('DROP TRIGGER IF EXISTS tasks_fts_insert')
+        op.execute('DROP TABLE IF EXISTS tasks_fts')
+    elif dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_tasks_search_vector')
+        op.execute('ALTER TABLE tasks DROP COLUMN IF EXISTS search_vector')
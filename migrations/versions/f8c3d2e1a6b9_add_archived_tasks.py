@@ -0,0 +1,93 @@
+"""add archived tasks
+
+Revision ID: f8c3d2e1a6b9
+Revises: e4b1f9a7c2d3
+Create Date: 2026-10-18 15:40:51.207314
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8c3d2e1a6b9'
+down_revision: Union[str, None] = 'e4b1f9a7c2d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The SQLite triggers on tasks as of this revision.
+SQLITE_TASKS_TRIGGERS = (
+    'CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN '
+    'INSERT INTO tasks_fts(rowid, title, description) '
+    'VALUES (new.id, new.title, new.description); END',
+    'CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN '
+    'INSERT INTO tasks_fts(tasks_fts, rowid, title, description) '
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    'CREATE TRIGGER tasks_fts_update AFTER UPDATE OF title, description ON tasks '
+    'BEGIN '
+    'INSERT INTO tasks_fts(tasks_fts, rowid, title, description) '
+    "VALUES ('delete', old.id, old.title, old.description); "
+    'INSERT INTO tasks_fts(rowid, title, description) '
+    'VALUES (new.id, new.title, new.description); END',
+    'CREATE TRIGGER task_state_counts_insert AFTER INSERT ON tasks BEGIN '
+    'INSERT INTO task_state_counts(user_id, state, count) '
+    'VALUES (new.user_id, new.state, 1) '
+    'ON CONFLICT(user_id, state) DO UPDATE SET count = count + 1; END',
+    'CREATE TRIGGER task_state_counts_delete AFTER DELETE ON tasks BEGIN '
+    'UPDATE task_state_counts SET count = count - 1 '
+    'WHERE user_id = old.user_id AND state = old.state; END',
+    'CREATE TRIGGER task_state_counts_update AFTER UPDATE OF state, user_id '
+    'ON tasks WHEN old.state IS NOT new.state OR old.user_id IS NOT new.user_id '
+    'BEGIN '
+    'UPDATE task_state_counts SET count = count - 1 '
+    'WHERE user_id = old.user_id AND state = old.state; '
+    'INSERT INTO task_state_counts(user_id, state, count) '
+    'VALUES (new.user_id, new.state, 1) '
+    'ON CONFLICT(user_id, state) DO UPDATE SET count = count + 1; END',
+)
+
+
+def recreate_sqlite_tasks(autoincrement: bool) -> None:
+    # Rebuilding the table drops its triggers, so they are created again.
+    with op.batch_alter_table(
+        'tasks',
+        recreate='always',
+        table_kwargs={'sqlite_autoincrement': autoincrement},
+    ):
+        pass
+    for statement in SQLITE_TASKS_TRIGGERS:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table('archived_tasks',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('description', sa.String(), nullable=False),
+    sa.Column('state', postgresql.ENUM('DRAFT', 'TODO', 'DOING', 'DONE', 'TRASH', name='taskstate', create_type=False), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_archived_tasks_user_id_id', 'archived_tasks', ['user_id', 'id'], unique=False)
+    op.create_index('ix_tasks_state_updated_at', 'tasks', ['state', 'updated_at'], unique=False)
+    # ### end Alembic commands ###
+    if op.get_bind().dialect.name == 'sqlite':
+        recreate_sqlite_tasks(autoincrement=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        recreate_sqlite_tasks(autoincrement=False)
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_index('ix_tasks_state_updated_at', table_name='tasks')
+    op.drop_index('ix_archived_tasks_user_id_id', table_name='archived_tasks')
+    op.drop_table('archived_tasks')
+    # ### end Alembic commands ###
@@ -1,84 +1,110 @@
-import factory
 import pytest
-from factory import fuzzy
-from faker import Faker
+import pytest_asyncio
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.pool import StaticPool
 
 from curso_fastapi.app import app
 from curso_fastapi.database import get_session
-from curso_fastapi.models import Task, TaskState, User, table_registry
-from curso_fastapi.security import get_password_hash
-
-fake = Faker('pt_BR')
-
-
-class TaskFactory(factory.Factory):
-    class Meta:
-        model = Task
-
-    title = factory.LazyAttribute(lambda _: fake.sentence())
-    description = factory.LazyAttribute(lambda _: fake.text())
-    state = fuzzy.FuzzyChoice(TaskState)
-    user_id = 1
-
-
-class UserFactory(factory.Factory):
-    class Meta:
-        model = User
-
-    username = factory.Sequence(lambda n: f'test{n}')
-    email = factory.LazyAttribute(lambda obj: f'{obj.username}@test.com')
-    password = factory.LazyAttribute(lambda obj: f'{obj.username}_password')
+from curso_fastapi.hashing import get_password_hash
+from curso_fastapi.jobs import job_queue
+from curso_fastapi.models import table_registry
+from curso_fastapi.ratelimit import rate_limiter
+from curso_fastapi.replicas import get_read_session, recent_writers
+from curso_fastapi.routers.tasks import tasks_cache
+from curso_fastapi.security import token_cache, user_cache
+from tests.factories import TaskFactory, UserFactory
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    yield
+    token_cache.clear()
+    user_cache.clear()
+    tasks_cache.clear()
+    rate_limiter.clear()
+    recent_writers.clear()
 
 
 @pytest.fixture
-def client(session):
+def client(session, jobs):
     def get_session_override():
         return session
 
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_read_session] = get_session_override
         yield client
         del app.dependency_overrides[get_session]
+        del app.dependency_overrides[get_read_session]
 
 
-@pytest.fixture
-def session():
-    engine = create_engine(
-        'sqlite:///:memory:',
+@pytest_asyncio.fixture
+async def session():
+    engine = create_async_engine(
+        'sqlite+aiosqlite:///:memory:',
         connect_args={'check_same_thread': False},
         poolclass=StaticPool,
     )
-    table_registry.metadata.create_all(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
 
-    with Session(engine) as session:
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
 
-    table_registry.metadata.drop_all(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def jobs(session, monkeypatch):
+    store = create_async_engine(
+        'sqlite+aiosqlite:///:memory:',
+        connect_args={'check_same_thread': False},
+        poolclass=StaticPool,
+    )
+    monkeypatch.setattr(job_queue, 'store', store)
+    monkeypatch.setattr(job_queue, 'bind', session.bind)
+    # Tests drain the queue explicitly with run_pending instead of racing workers.
+    monkeypatch.setattr(job_queue, 'workers', 0)
+    yield job_queue
+    await store.dispose()
 
 
 @pytest.fixture
-def user(session):
+def sql_statements(session):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = session.bind.sync_engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest_asyncio.fixture
+async def user(session):
     password = 'test'
     user = UserFactory(password=get_password_hash(password))
 
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
 
     user.cleaned_password = password
     return user
 
 
-@pytest.fixture
-def another_user(session):
+@pytest_asyncio.fixture
+async def another_user(session):
     user = UserFactory()
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
     return user
 
 
@@ -91,11 +117,11 @@ def token(client, user):
     return response.json()['access_token']
 
 
-@pytest.fixture
-def task(session, user):
+@pytest_asyncio.fixture
+async def task(session, user):
     description = 'Test Description'
     task = TaskFactory(user_id=user.id, description=description)
     session.add(task)
-    session.commit()
-    session.refresh(task)
+    await session.commit()
+    await session.refresh(task)
     return task
@@ -0,0 +1,26 @@
+import factory
+from factory import fuzzy
+from faker import Faker
+
+from curso_fastapi.models import Task, TaskState, User
+
+fake = Faker('pt_BR')
+
+
+class TaskFactory(factory.Factory):
+    class Meta:
+        model = Task
+
+    title = factory.LazyAttribute(lambda _: fake.sentence())
+    description = factory.LazyAttribute(lambda _: fake.text())
+    state = fuzzy.FuzzyChoice(TaskState)
+    user_id = 1
+
+
+class UserFactory(factory.Factory):
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: f'test{n}')
+    email = factory.LazyAttribute(lambda obj: f'{obj.username}@test.com')
+    password = factory.LazyAttribute(lambda obj: f'{obj.username}_password')
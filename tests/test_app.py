@@ -0,0 +1,65 @@
+from http import HTTPStatus
+
+import pytest
+
+from curso_fastapi.metrics import http_request_duration_seconds
+from curso_fastapi.security import auth_failures_total
+from curso_fastapi.settings import settings
+
+METRICS_TOKEN = 'metrics-secret'
+
+
+@pytest.fixture
+def metrics(client, monkeypatch):
+    monkeypatch.setattr(settings, 'METRICS_TOKEN', METRICS_TOKEN)
+
+    def get_metrics():
+        return client.get(
+            '/metrics', headers={'Authorization': f'Bearer {METRICS_TOKEN}'}
+        )
+
+    return get_metrics
+
+
+def test_metrics_is_disabled_without_a_token(client):
+    assert client.get('/metrics').status_code == HTTPStatus.NOT_FOUND
+
+
+def test_metrics_requires_the_token(client, metrics):
+    assert client.get('/metrics').status_code == HTTPStatus.UNAUTHORIZED
+    response = client.get('/metrics', headers={'Authorization': 'Bearer wrong'})
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_metrics_exposes_pool_metrics(metrics):
+    response = metrics()
+
+    assert response.status_code == HTTPStatus.OK
+    assert '# TYPE db_pool_wait_seconds histogram' in response.text
+    assert 'db_pool_checked_out 0' in response.text
+    assert 'db_pool_overflow_total' in response.text
+
+
+def test_metrics_exposes_route_latency(client, token, metrics):
+    series = http_request_duration_seconds.labels('GET', '/tasks/', 200)
+    requests = series.count
+
+    client.get('/tasks/', headers={'Authorization': f'Bearer {token}'})
+    client.get('/tasks/', headers={'Authorization': f'Bearer {token}'})
+    response = metrics()
+
+    assert series.count == requests + 2
+    assert (
+        'http_request_duration_seconds_count'
+        f'{{method="GET",route="/tasks/",status="200"}} {series.count}'
+    ) in response.text
+    assert 'http_requests_in_flight 1' in response.text
+
+
+def test_metrics_counts_auth_failures(client, metrics):
+    failures = auth_failures_total.labels('invalid_token').value
+
+    client.get('/tasks/', headers={'Authorization': 'Bearer invalid'})
+
+    assert auth_failures_total.labels('invalid_token').value == failures + 1
+    assert 'auth_failures_total{reason="invalid_token"}' in metrics().text
@@ -0,0 +1,132 @@
+import csv
+import io
+import json
+from datetime import datetime
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, update
+
+from curso_fastapi.archive import archive_tasks
+from curso_fastapi.models import ArchivedTask, Task
+from tests.conftest import TaskFactory
+
+OLD = datetime(2020, 1, 1)
+THRESHOLD = datetime(2021, 1, 1)
+
+
+@pytest_asyncio.fixture
+async def tasks(session, user):
+    tasks = [
+        TaskFactory(user_id=user.id, state='trash', title='old trash'),
+        TaskFactory(user_id=user.id, state='done', title='old done'),
+        TaskFactory(user_id=user.id, state='todo', title='old todo'),
+        TaskFactory(user_id=user.id, state='done', title='recent done'),
+    ]
+    session.add_all(tasks)
+    await session.commit()
+    await session.execute(
+        update(Task)
+        .where(Task.id.in_([task.id for task in tasks[:3]]))
+        .values(updated_at=OLD)
+    )
+    await session.commit()
+    return tasks
+
+
+@pytest.mark.asyncio
+async def test_archive_tasks_moves_old_trash_and_done_in_batches(session, tasks):
+    archived = await archive_tasks(session, THRESHOLD, batch_size=1)
+
+    assert archived == len(tasks[:2])
+    hot = await session.scalars(select(Task.title).order_by(Task.id))
+    assert hot.all() == ['old todo', 'recent done']
+    cold = await session.scalars(select(ArchivedTask).order_by(ArchivedTask.id))
+    assert [(task.id, task.title, task.updated_at) for task in cold] == [
+        (tasks[0].id, 'old trash', OLD),
+        (tasks[1].id, 'old done', OLD),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_include_archived(client, token, session, tasks):
+    await archive_tasks(session, THRESHOLD, batch_size=10)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.get('/tasks/', headers=headers)
+    assert [task['title'] for task in response.json()['tasks']] == [
+        'old todo',
+        'recent done',
+    ]
+
+    response = client.get(
+        '/tasks/?include_archived=true&state=done&include_total=true',
+        headers=headers,
+    )
+    assert [task['title'] for task in response.json()['tasks']] == [
+        'old done',
+        'recent done',
+    ]
+    assert response.json()['total'] == len(response.json()['tasks'])
+
+    response = client.get('/tasks/?include_archived=true&q=old', headers=headers)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Search does not cover archived tasks'}
+
+
+@pytest.mark.asyncio
+async def test_export_tasks_include_archived(client, token, session, tasks):
+    await archive_tasks(session, THRESHOLD, batch_size=10)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.get('/tasks/export?state=done', headers=headers)
+    assert [json.loads(line)['title'] for line in response.text.splitlines()] == [
+        'recent done'
+    ]
+
+    response = client.get(
+        '/tasks/export?state=done&include_archived=true&format=csv', headers=headers
+    )
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert [(row[1], row[3]) for row in rows[1:]] == [
+        ('old done', 'done'),
+        ('recent done', 'done'),
+    ]
+
+    response = client.get('/tasks/export?include_archived=true&q=old', headers=headers)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_archiving_invalidates_cached_pages(client, token, session, tasks):
+    headers = {'Authorization': f'Bearer {token}'}
+    before = client.get('/tasks/', headers=headers)
+
+    await archive_tasks(session, THRESHOLD, batch_size=10)
+    response = client.get(
+        '/tasks/', headers={**headers, 'If-None-Match': before.headers['etag']}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [task['title'] for task in response.json()['tasks']] == [
+        'old todo',
+        'recent done',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_archived_ids_are_not_reused(client, token, session, user):
+    task = TaskFactory(user_id=user.id, state='trash')
+    session.add(task)
+    await session.commit()
+    await session.execute(update(Task).values(updated_at=OLD))
+    await archive_tasks(session, THRESHOLD, batch_size=10)
+
+    response = client.post(
+        '/tasks/',
+        json={'title': 'New', 'description': 'New', 'state': 'todo'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.json()['id'] > task.id
@@ -0,0 +1,63 @@
+from freezegun import freeze_time
+
+from curso_fastapi.cache import ResultCache, TTLCache, load_backend
+
+
+class DictBackend:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value, expires_at=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def clear(self):
+        self.data.clear()
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+
+    cache.set('c', 3)
+
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert 'c' in cache
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(ttl=60)
+    with freeze_time('2024-01-01 00:00:00'):
+        cache.set('a', 1)
+
+    with freeze_time('2024-01-01 00:00:59'):
+        assert cache.get('a') == 1
+
+    with freeze_time('2024-01-01 00:01:00'):
+        assert cache.get('a') is None
+
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_result_cache_invalidates_per_owner():
+    cache = ResultCache(load_backend('tests.test_cache:DictBackend'), 'tasks')
+    first_key = cache.key(1, 'page')
+    cache.set(first_key, b'first')
+    cache.set(cache.key(2, 'page'), b'second')
+
+    cache.invalidate(1)
+
+    assert cache.key(1, 'page') != first_key
+    assert cache.get(cache.key(1, 'page')) is None
+    assert cache.get(cache.key(2, 'page')) == b'second'
+    assert cache.hits == 1
+    assert cache.misses == 1
@@ -0,0 +1,45 @@
+from http import HTTPStatus
+
+import pytest
+
+from curso_fastapi.hashing import (
+    HashingPool,
+    get_password_hash,
+    hashing_pool,
+    verify_password,
+)
+
+
+@pytest.mark.asyncio
+async def test_process_hashing_pool_hashes_and_verifies():
+    pool = HashingPool(kind='process', max_workers=1)
+
+    hashed = await pool.run(get_password_hash, 'secret')
+
+    assert await pool.run(verify_password, 'secret', hashed)
+    assert not await pool.run(verify_password, 'wrong', hashed)
+    pool.shutdown()
+
+
+def test_login_returns_503_when_hashing_pool_is_full(client, user, monkeypatch):
+    monkeypatch.setattr(hashing_pool, 'max_pending', 0)
+
+    response = client.post(
+        '/auth/token/',
+        data={'username': user.username, 'password': user.cleaned_password},
+    )
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.headers['Retry-After'] == '1'
+    assert response.json() == {'detail': 'Server busy, try again later'}
+
+
+def test_create_user_returns_503_when_hashing_pool_is_full(client, monkeypatch):
+    monkeypatch.setattr(hashing_pool, 'max_pending', 0)
+
+    response = client.post(
+        '/users/',
+        json={'username': 'alice', 'password': 'secret', 'email': 'alice@test.com'},
+    )
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
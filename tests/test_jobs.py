@@ -0,0 +1,239 @@
+import asyncio
+from datetime import datetime
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from curso_fastapi.jobs import (
+    Job,
+    JobQueue,
+    JobStatus,
+    job_latency_seconds,
+    job_queue,
+)
+from curso_fastapi.models import ArchivedTask, Task, TaskStateCount, TaskVersion, User
+from curso_fastapi.settings import settings
+from tests.conftest import TaskFactory
+
+
+async def job_rows(store):
+    async with AsyncSession(store) as session:
+        return (await session.scalars(select(Job).order_by(Job.id))).all()
+
+
+@pytest.mark.asyncio
+async def test_run_pending_runs_jobs_in_order(jobs, session):
+    queue = JobQueue(jobs.store, session.bind, workers=0)
+    calls = []
+
+    @queue.job('record')
+    async def record(session, value):
+        calls.append(value)
+
+    values = ['first', 'second']
+    await queue.start()
+    for value in values:
+        await queue.enqueue('record', value=value)
+    assert queue.depth == len(values)
+
+    latency_count = job_latency_seconds.labels('record').count
+    assert await queue.run_pending() == len(values)
+
+    assert calls == values
+    assert queue.depth == 0
+    assert job_latency_seconds.labels('record').count == latency_count + len(values)
+    assert {job.status for job in await job_rows(jobs.store)} == {JobStatus.DONE}
+
+
+@pytest.mark.asyncio
+async def test_failed_jobs_are_retried_until_max_attempts(jobs, session):
+    max_attempts = 3
+    queue = JobQueue(
+        jobs.store, session.bind, workers=0, max_attempts=max_attempts, retry_backoff=0
+    )
+    attempts = []
+
+    @queue.job('flaky')
+    async def flaky(session):
+        attempts.append(1)
+        if len(attempts) < max_attempts:
+            raise RuntimeError('boom')
+
+    @queue.job('broken')
+    async def broken(session):
+        raise RuntimeError('always')
+
+    await queue.start()
+    await queue.enqueue('flaky')
+    await queue.enqueue('broken')
+    await queue.enqueue('unknown')
+    await queue.run_pending()
+
+    flaky_job, broken_job, unknown_job = await job_rows(jobs.store)
+    assert (flaky_job.status, flaky_job.attempts) == (JobStatus.DONE, max_attempts)
+    assert (broken_job.status, broken_job.attempts) == (JobStatus.FAILED, max_attempts)
+    assert broken_job.last_error == 'RuntimeError: always'
+    assert (unknown_job.status, unknown_job.attempts) == (JobStatus.FAILED, 1)
+
+
+async def expire_leases(store):
+    async with AsyncSession(store) as session:
+        await session.execute(update(Job).values(lease_expires_at=datetime(2000, 1, 1)))
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_start_resumes_jobs_interrupted_mid_run(jobs, session):
+    queue = JobQueue(jobs.store, session.bind, workers=0)
+    await queue.start()
+    await queue.enqueue('record', value='lost')
+    await queue.claim()
+    assert queue.depth == 0
+
+    await expire_leases(jobs.store)
+    await queue.start()
+
+    assert queue.depth == 1
+    (job,) = await job_rows(jobs.store)
+    assert (job.status, job.claimed_by) == (JobStatus.PENDING, None)
+
+
+@pytest.mark.asyncio
+async def test_queues_sharing_a_store_respect_each_others_leases(jobs, session):
+    running = JobQueue(jobs.store, session.bind, workers=0)
+    restarted = JobQueue(jobs.store, session.bind, workers=0)
+    claims = 2
+    calls = []
+
+    @restarted.job('record')
+    async def record(session, value):
+        calls.append(value)
+
+    await running.start()
+    await running.enqueue('record', value='once')
+    job = await running.claim()
+
+    await restarted.start()
+    assert await restarted.run_pending() == 0
+    (row,) = await job_rows(jobs.store)
+    assert (row.status, row.claimed_by) == (JobStatus.RUNNING, running.worker_id)
+
+    await expire_leases(jobs.store)
+    await restarted.start()
+    assert await restarted.run_pending() == 1
+    assert calls == ['once']
+
+    # The original owner lost its lease and must not overwrite the outcome.
+    await running.finish(job, status=JobStatus.FAILED)
+    (row,) = await job_rows(jobs.store)
+    assert row.status == JobStatus.DONE
+    assert row.attempts == claims
+
+
+@pytest.mark.asyncio
+async def test_running_jobs_renew_their_lease(jobs, session):
+    queue = JobQueue(jobs.store, session.bind, workers=0)
+    queue.lease_seconds = 0.3
+    leases = []
+
+    @queue.job('slow')
+    async def slow(session):
+        for _ in range(2):
+            leases.append((await job_rows(jobs.store))[0].lease_expires_at)
+            await asyncio.sleep(queue.lease_seconds)
+
+    await queue.start()
+    await queue.enqueue('slow')
+    await queue.run_pending()
+
+    assert leases[1] > leases[0]
+
+
+@pytest.mark.asyncio
+async def test_workers_pick_up_enqueued_jobs(jobs, session):
+    queue = JobQueue(jobs.store, session.bind, workers=2)
+    done = asyncio.Event()
+
+    @queue.job('notify')
+    async def notify(session):
+        done.set()
+
+    await queue.start()
+    await queue.enqueue('notify')
+    await asyncio.wait_for(done.wait(), timeout=5)
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_delete_user_purges_tasks_in_background(
+    client, token, session, user, monkeypatch
+):
+    monkeypatch.setattr(settings, 'USER_DELETE_BATCH_SIZE', 2)
+    monkeypatch.setattr(settings, 'USER_CACHE_TTL_SECONDS', 0)
+    session.add_all(TaskFactory.create_batch(5, user_id=user.id))
+    session.add(
+        ArchivedTask(
+            id=100,
+            title='old',
+            description='old',
+            state='done',
+            created_at=user.created_at,
+            updated_at=user.created_at,
+            user_id=user.id,
+        )
+    )
+    await session.commit()
+
+    response = client.delete(
+        f'/users/{user.id}/', headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+    assert client.get(f'/users/{user.id}').status_code == HTTPStatus.NOT_FOUND
+    assert client.get('/users/').json()['users'] == []
+    response = client.post(
+        '/auth/token',
+        data={'username': user.username, 'password': user.cleaned_password},
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    assert await job_queue.run_pending() == 1
+
+    for model in (Task, ArchivedTask, TaskStateCount, TaskVersion, User):
+        assert await session.scalar(select(func.count()).select_from(model)) == 0
+
+
+@pytest.mark.asyncio
+async def test_delete_user_waits_for_cached_users_to_expire(
+    client, token, session, user
+):
+    session.add_all(TaskFactory.create_batch(3, user_id=user.id))
+    await session.commit()
+
+    client.delete(f'/users/{user.id}/', headers={'Authorization': f'Bearer {token}'})
+
+    assert await job_queue.run_pending() == 0
+    assert await session.scalar(select(func.count()).select_from(User)) == 1
+    job = (await job_rows(job_queue.store))[0]
+    assert job.run_at > job.created_at
+
+
+@pytest.mark.asyncio
+async def test_delete_user_job_resumes_after_crash(
+    client, token, session, user, monkeypatch
+):
+    monkeypatch.setattr(settings, 'USER_CACHE_TTL_SECONDS', 0)
+    session.add_all(TaskFactory.create_batch(3, user_id=user.id))
+    await session.commit()
+    client.delete(f'/users/{user.id}/', headers={'Authorization': f'Bearer {token}'})
+
+    async with AsyncSession(job_queue.store) as store:
+        await store.execute(update(Job).values(status=JobStatus.RUNNING))
+        await store.commit()
+    await job_queue.start()
+    await job_queue.run_pending()
+
+    assert await session.scalar(select(func.count()).select_from(Task)) == 0
+    assert await session.scalar(select(func.count()).select_from(User)) == 0
@@ -0,0 +1,132 @@
+from time import sleep
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool, StaticPool
+
+from curso_fastapi.database import (
+    InstrumentedQueuePool,
+    create_engine,
+    instrument_engine,
+    pool_connect_seconds,
+    pool_wait_seconds,
+)
+from curso_fastapi.metrics import Counter, Histogram, Registry
+from curso_fastapi.settings import settings
+
+
+def test_histogram_observe_fills_cumulative_buckets():
+    histogram = Histogram(
+        'test_histogram_seconds', 'Test', buckets=(0.1, 1.0), registry=Registry()
+    )
+
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    assert histogram.samples() == [
+        'test_histogram_seconds_bucket{le="0.1"} 1',
+        'test_histogram_seconds_bucket{le="1.0"} 2',
+        'test_histogram_seconds_bucket{le="+Inf"} 3',
+        'test_histogram_seconds_sum 5.55',
+        'test_histogram_seconds_count 3',
+    ]
+
+
+def test_labeled_metrics_render_one_series_per_label_set():
+    registry = Registry()
+    counter = Counter('test_total', 'Test', labelnames=('reason',), registry=registry)
+    histogram = Histogram(
+        'test_seconds',
+        'Test',
+        buckets=(1.0,),
+        labelnames=('route',),
+        registry=registry,
+    )
+
+    counter.labels('expired').inc()
+    counter.labels('expired').inc()
+    counter.labels('invalid').inc()
+    histogram.labels('/tasks/').observe(0.5)
+
+    assert registry.render().splitlines() == [
+        '# HELP test_total Test',
+        '# TYPE test_total counter',
+        'test_total{reason="expired"} 2',
+        'test_total{reason="invalid"} 1',
+        '# HELP test_seconds Test',
+        '# TYPE test_seconds histogram',
+        'test_seconds_bucket{route="/tasks/",le="1.0"} 1',
+        'test_seconds_bucket{route="/tasks/",le="+Inf"} 1',
+        'test_seconds_sum{route="/tasks/"} 0.5',
+        'test_seconds_count{route="/tasks/"} 1',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_instrumented_pool_records_wait_and_connect(tmp_path):
+    engine = create_async_engine(
+        f'sqlite+aiosqlite:///{tmp_path / "pool.db"}',
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+    )
+    instrument_engine(engine)
+    waits, connects = pool_wait_seconds.count, pool_connect_seconds.count
+
+    async with engine.connect() as conn:
+        await conn.execute(text('SELECT 1'))
+    async with engine.connect() as conn:
+        await conn.execute(text('SELECT 1'))
+    await engine.dispose()
+
+    assert pool_wait_seconds.count == waits + 2
+    assert pool_connect_seconds.count == connects + 1
+
+
+@pytest.mark.asyncio
+async def test_pool_wait_excludes_opening_connections(tmp_path):
+    connect_delay = 0.05
+    engine = create_async_engine(
+        f'sqlite+aiosqlite:///{tmp_path / "pool.db"}',
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+    )
+    instrument_engine(engine)
+
+    @event.listens_for(engine.sync_engine, 'do_connect')
+    def slow_connect(*args):
+        sleep(connect_delay)
+
+    waited, connecting = pool_wait_seconds.sum, pool_connect_seconds.sum
+    async with engine.connect() as conn:
+        await conn.execute(text('SELECT 1'))
+    await engine.dispose()
+
+    assert pool_connect_seconds.sum - connecting >= connect_delay
+    assert pool_wait_seconds.sum - waited < connect_delay
+
+
+@pytest.mark.asyncio
+async def test_create_engine_shares_one_connection_for_in_memory_sqlite():
+    engine = create_engine('sqlite+aiosqlite:///:memory:')
+    assert isinstance(engine.pool, StaticPool)
+
+    async with engine.begin() as conn:
+        await conn.execute(text('CREATE TABLE items (id INTEGER)'))
+    async with engine.connect() as conn:
+        assert (await conn.execute(text('SELECT count(*) FROM items'))).scalar() == 0
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_create_engine_pool_class_setting(tmp_path, monkeypatch):
+    url = f'sqlite+aiosqlite:///{tmp_path / "pool.db"}'
+    engine = create_engine(url)
+    assert isinstance(engine.pool, InstrumentedQueuePool)
+    await engine.dispose()
+
+    monkeypatch.setattr(settings, 'DATABASE_POOL_CLASS', 'null')
+    engine = create_engine(url)
+    assert isinstance(engine.pool, NullPool)
+    await engine.dispose()
@@ -0,0 +1,17 @@
+from alembic import command
+from alembic.config import Config
+
+from curso_fastapi.settings import settings
+
+
+def test_migrations_match_the_models(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        settings, 'DATABASE_URL', f'sqlite+aiosqlite:///{tmp_path}/migrations.db'
+    )
+    # No ini file, so env.py leaves the test session's logging alone.
+    config = Config()
+    config.set_main_option('script_location', 'migrations')
+
+    command.upgrade(config, 'head')
+
+    command.check(config)
@@ -0,0 +1,50 @@
+import json
+import logging
+import re
+from http import HTTPStatus
+
+from curso_fastapi import profiling
+from curso_fastapi.settings import settings
+
+
+def server_timing(response):
+    return dict(
+        re.match(r'(\w+);dur=([\d.]+)', metric).groups()
+        for metric in response.headers['server-timing'].split(', ')
+    )
+
+
+def test_server_timing_reports_phases(client, token, task):
+    response = client.get('/tasks/', headers={'Authorization': f'Bearer {token}'})
+
+    timings = server_timing(response)
+    assert {'total', 'db', 'auth', 'serialize'} <= timings.keys()
+    assert float(timings['total']) >= float(timings['db'])
+    assert 'queries"' in response.headers['server-timing']
+
+
+def test_request_is_logged_as_json(client, token, caplog):
+    with caplog.at_level(logging.INFO, logger='curso_fastapi.requests'):
+        client.get('/tasks/', headers={'Authorization': f'Bearer {token}'})
+
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record['method'] == 'GET'
+    assert record['path'] == '/tasks/'
+    assert record['status'] == HTTPStatus.OK
+    assert record['queries'] > 0
+    assert 'auth' in record['phases_ms']
+
+
+def test_query_budget_flags_requests(client, token, caplog, monkeypatch):
+    budget = 1
+    monkeypatch.setattr(settings, 'QUERY_BUDGET', budget)
+    exceeded = profiling.query_budget_exceeded_total.value
+
+    with caplog.at_level(logging.WARNING, logger='curso_fastapi.requests'):
+        client.get('/tasks/', headers={'Authorization': f'Bearer {token}'})
+
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record['queries'] > budget
+    assert record['query_budget'] == budget
+    assert record['most_repeated_statement']['count'] >= 1
+    assert profiling.query_budget_exceeded_total.value == exceeded + 1
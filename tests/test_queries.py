@@ -0,0 +1,100 @@
+from http import HTTPStatus
+
+import pytest
+
+
+@pytest.fixture
+def auth_headers(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/tasks/', headers=headers)
+    return headers
+
+
+def test_create_task_runs_a_single_statement(client, auth_headers, sql_statements):
+    sql_statements.clear()
+
+    response = client.post(
+        '/tasks/',
+        json={'title': 'Test', 'description': 'Test', 'state': 'todo'},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert len(sql_statements) == 1
+    assert 'RETURNING' in sql_statements[0]
+
+
+def test_update_task_runs_a_single_statement(
+    client, auth_headers, session, task, sql_statements
+):
+    session.expunge_all()
+    sql_statements.clear()
+
+    response = client.patch(
+        f'/tasks/{task.id}', json={'title': 'Updated'}, headers=auth_headers
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['title'] == 'Updated'
+    assert len(sql_statements) == 1
+    assert sql_statements[0].startswith('UPDATE tasks')
+    assert 'RETURNING' in sql_statements[0]
+
+
+def test_delete_task_runs_a_single_statement(
+    client, auth_headers, session, task, sql_statements
+):
+    session.expunge_all()
+    sql_statements.clear()
+
+    response = client.delete(f'/tasks/{task.id}', headers=auth_headers)
+
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert len(sql_statements) == 1
+    assert sql_statements[0].startswith('UPDATE tasks SET state=')
+
+
+def test_permanent_delete_task_runs_a_single_statement(
+    client, auth_headers, session, task, sql_statements
+):
+    session.expunge_all()
+    sql_statements.clear()
+
+    response = client.delete(f'/tasks/{task.id}?permanent=true', headers=auth_headers)
+
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert len(sql_statements) == 1
+    assert sql_statements[0].startswith('DELETE FROM tasks')
+
+
+def test_create_user_statements(client, sql_statements):
+    expected_statements = 2
+    response = client.post(
+        '/users/',
+        json={'username': 'alice', 'password': 'secret', 'email': 'alice@test.com'},
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert 'created_at' in response.json()
+    assert len(sql_statements) == expected_statements
+    assert sql_statements[-1].startswith('INSERT INTO users')
+    assert 'RETURNING' in sql_statements[-1]
+
+
+def test_update_user_runs_a_single_statement(
+    client, auth_headers, session, user, sql_statements
+):
+    session.expunge_all()
+    sql_statements.clear()
+
+    response = client.put(
+        f'/users/{user.id}',
+        json={'username': 'renamed', 'password': 'secret', 'email': user.email},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'updated_at' in response.json()
+    assert len(sql_statements) == 1
+    assert sql_statements[0].startswith('UPDATE users')
+    assert 'RETURNING' in sql_statements[0]
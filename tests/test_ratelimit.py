@@ -0,0 +1,65 @@
+from http import HTTPStatus
+
+from freezegun import freeze_time
+
+from curso_fastapi.ratelimit import MemoryBackend, rate_limiter
+from curso_fastapi.settings import settings
+
+
+def test_memory_backend_refills_tokens_over_time():
+    backend = MemoryBackend()
+    with freeze_time('2024-01-01 00:00:00'):
+        assert backend.hit('key', 2, 1.0) == 0
+        assert backend.hit('key', 2, 1.0) == 0
+        assert backend.hit('key', 2, 1.0) == 1.0
+
+    with freeze_time('2024-01-01 00:00:01'):
+        assert backend.hit('key', 2, 1.0) == 0
+
+
+def test_memory_backend_evicts_least_recently_used_keys():
+    backend = MemoryBackend(maxsize=1)
+    backend.hit('a', 1, 1.0)
+    backend.hit('b', 1, 1.0)
+
+    assert backend.hit('a', 1, 1.0) == 0
+
+
+def test_login_is_limited_per_username(client, user, monkeypatch):
+    monkeypatch.setattr(settings, 'LOGIN_RATE_LIMIT_PER_USERNAME', 2)
+    form = {'username': user.username, 'password': 'wrong'}
+
+    for _ in range(2):
+        response = client.post('/auth/token/', data=form)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    response = client.post('/auth/token/', data=form)
+
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert response.json() == {'detail': 'Too many requests, try again later'}
+    assert int(response.headers['retry-after']) > 0
+
+
+def test_task_writes_are_limited_per_user(client, token, monkeypatch):
+    monkeypatch.setattr(settings, 'TASK_WRITES_RATE_LIMIT_PER_USER', 1)
+    headers = {'Authorization': f'Bearer {token}'}
+    task = {'title': 'Title', 'description': 'Description', 'state': 'todo'}
+
+    assert client.post('/tasks/', json=task, headers=headers).status_code == (
+        HTTPStatus.CREATED
+    )
+    response = client.post('/tasks/', json=task, headers=headers)
+
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert client.get('/tasks/', headers=headers).status_code == HTTPStatus.OK
+
+
+def test_disabled_rate_limiter_lets_requests_through(client, token, monkeypatch):
+    monkeypatch.setattr(settings, 'TASK_WRITES_RATE_LIMIT_PER_USER', 1)
+    monkeypatch.setattr(rate_limiter, 'enabled', False)
+    headers = {'Authorization': f'Bearer {token}'}
+    task = {'title': 'Title', 'description': 'Description', 'state': 'todo'}
+
+    for _ in range(3):
+        response = client.post('/tasks/', json=task, headers=headers)
+        assert response.status_code == HTTPStatus.CREATED
@@ -0,0 +1,156 @@
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from curso_fastapi import replicas
+from curso_fastapi.app import app
+from curso_fastapi.database import get_session
+from curso_fastapi.models import Task, User, table_registry
+from curso_fastapi.replicas import (
+    ReplicaSet,
+    read_sessions_total,
+    recent_writers,
+    stick_to_primary,
+    writer_key,
+)
+from curso_fastapi.routers.tasks import tasks_cache
+from curso_fastapi.security import create_access_token
+from tests.conftest import UserFactory
+
+
+@pytest_asyncio.fixture
+async def databases(tmp_path):
+    engines = {
+        name: create_async_engine(f'sqlite+aiosqlite:///{tmp_path / name}.db')
+        for name in ('primary', 'replica_a', 'replica_b')
+    }
+    for engine in engines.values():
+        async with engine.begin() as conn:
+            await conn.run_sync(table_registry.metadata.create_all)
+        async with AsyncSession(engine) as session:
+            session.add(User(username='alice', email='alice@test.com', password='x'))
+            await session.commit()
+
+    yield engines
+
+    for engine in engines.values():
+        await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def broken(tmp_path):
+    engine = create_async_engine(f'sqlite+aiosqlite:///{tmp_path}/missing/replica.db')
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def replica_client(databases, jobs, monkeypatch):
+    primary = databases['primary']
+    replica_set = ReplicaSet(primary, [databases['replica_a']])
+    monkeypatch.setattr(replicas, 'replica_set', replica_set)
+
+    async def get_session_override():
+        async with AsyncSession(primary, expire_on_commit=False) as session:
+            yield session
+
+    with TestClient(app) as client:
+        app.dependency_overrides[get_session] = get_session_override
+        client.headers['Authorization'] = (
+            f'Bearer {create_access_token({"sub": "alice"})}'
+        )
+        yield client
+        del app.dependency_overrides[get_session]
+
+
+async def add_task(engine, title):
+    async with AsyncSession(engine) as session:
+        session.add(Task(title=title, description='', state='todo', user_id=1))
+        await session.commit()
+
+
+def titles(response):
+    return [task['title'] for task in response.json()['tasks']]
+
+
+@pytest.mark.asyncio
+async def test_candidates_round_robin_over_healthy_replicas(databases):
+    primary, replica_a, replica_b = databases.values()
+    replica_set = ReplicaSet(primary, [replica_a, replica_b])
+
+    assert list(replica_set.candidates()) == [replica_a, replica_b, primary]
+    assert list(replica_set.candidates()) == [replica_b, replica_a, primary]
+
+    replica_set.mark_down(replica_a)
+    assert list(replica_set.candidates()) == [replica_b, primary]
+    replica_set.mark_down(replica_b)
+    assert list(replica_set.candidates()) == [primary]
+
+
+@pytest.mark.asyncio
+async def test_health_checks_take_replicas_out_and_back_in(databases, broken, tmp_path):
+    replica_set = ReplicaSet(databases['primary'], [databases['replica_a'], broken])
+
+    await replica_set.check_all(timeout=1)
+    assert replica_set.healthy == {databases['replica_a']: True, broken: False}
+
+    (tmp_path / 'missing').mkdir()
+    assert await replica_set.check(broken, timeout=1)
+    assert replica_set.healthy[broken]
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replicas_until_the_user_writes(replica_client, databases):
+    await add_task(databases['replica_a'], 'old')
+    await add_task(databases['replica_a'], 'replicated')
+
+    assert titles(replica_client.get('/tasks/')) == ['old', 'replicated']
+    assert replica_client.get('/users/1').json()['username'] == 'alice'
+
+    response = replica_client.post(
+        '/tasks/', json={'title': 'fresh', 'description': '', 'state': 'todo'}
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    assert recent_writers.get(writer_key('alice'))
+    assert titles(replica_client.get('/tasks/')) == ['fresh']
+    task_id = response.json()['id']
+    assert replica_client.get(f'/tasks/{task_id}').status_code == HTTPStatus.OK
+
+    recent_writers.clear()
+    tasks_cache.clear()
+    assert titles(replica_client.get('/tasks/')) == ['old', 'replicated']
+
+
+@pytest.mark.asyncio
+async def test_writers_stick_to_primary_before_the_write_runs():
+    writer = UserFactory()
+    dependency = stick_to_primary(writer)
+
+    await dependency.__anext__()
+
+    assert recent_writers.get(writer_key(writer.username))
+    await dependency.aclose()
+
+
+@pytest.mark.asyncio
+async def test_read_falls_back_when_replicas_are_down(
+    replica_client, databases, broken
+):
+    await add_task(databases['primary'], 'first')
+    await add_task(databases['primary'], 'second')
+    await add_task(databases['replica_b'], 'replica')
+    replica_set = replicas.replica_set
+    replica_set.replicas = [broken, databases['replica_b']]
+    replica_set.healthy = dict.fromkeys(replica_set.replicas, True)
+
+    assert titles(replica_client.get('/tasks/')) == ['replica']
+    assert not replica_set.healthy[broken]
+
+    primary_reads = read_sessions_total.labels('primary').value
+    replica_set.mark_down(databases['replica_b'])
+    tasks_cache.clear()
+    assert titles(replica_client.get('/tasks/')) == ['first', 'second']
+    assert read_sessions_total.labels('primary').value == primary_reads + 1
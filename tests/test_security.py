@@ -2,9 +2,17 @@ from datetime import datetime, timedelta
 from http import HTTPStatus
 
 import pytest
-from jwt import DecodeError, decode, encode
+from freezegun import freeze_time
+from jwt import DecodeError, ExpiredSignatureError, decode, encode
 
-from curso_fastapi.security import ALGORITHM, SECRET_KEY, create_access_token
+from curso_fastapi.security import (
+    ALGORITHM,
+    SECRET_KEY,
+    create_access_token,
+    decode_token,
+    token_cache,
+    user_cache,
+)
 
 
 def test_jwt():
@@ -36,7 +44,8 @@ def test_jwt_with_expires_delta():
     assert decoded_token['sub'] == data['sub']
 
 
-def test_get_current_user(client, token, user, session):
+@pytest.mark.asyncio
+async def test_get_current_user(client, token, user, session):
     response = client.put(
         f'/users/{user.id}/',
         json={
@@ -94,8 +103,8 @@ def test_get_current_user(client, token, user, session):
         assert response.status_code == HTTPStatus.UNAUTHORIZED
         assert response.json() == {'detail': 'Could not validate credentials'}
 
-    session.delete(user)
-    session.commit()
+    await session.delete(user)
+    await session.commit()
     response = client.put(
         f'/users/{user.id}/',
         json={
@@ -107,3 +116,69 @@ def test_get_current_user(client, token, user, session):
     )
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+def test_get_current_user_is_served_from_cache(client, token, sql_statements):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/tasks/', headers=headers)
+    hits = user_cache.hits
+    sql_statements.clear()
+
+    response = client.get('/tasks/', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert user_cache.hits == hits + 1
+    assert not [s for s in sql_statements if 'FROM users' in s]
+
+
+def test_update_user_with_cached_user_persists_changes(client, token, user):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/tasks/', headers=headers)
+
+    response = client.put(
+        f'/users/{user.id}/',
+        json={'username': 'renamed', 'password': '123456', 'email': user.email},
+        headers=headers,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert client.get(f'/users/{user.id}/').json()['username'] == 'renamed'
+    assert user.username not in user_cache
+
+
+def test_delete_user_invalidates_cached_user(client, token, user):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/tasks/', headers=headers)
+
+    response = client.delete(f'/users/{user.id}/', headers=headers)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+    response = client.get('/tasks/', headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_cached_user_marked_as_deleted_is_rejected(client, token, user):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/tasks/', headers=headers)
+    snapshot = user_cache.get(user.username)
+    user_cache.set(user.username, {**snapshot, 'deleted_at': datetime.now()})
+
+    response = client.get('/tasks/', headers=headers)
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert user.username not in user_cache
+
+
+def test_decode_token_caches_claims_until_expiration():
+    hits = token_cache.hits
+    with freeze_time('2024-01-01 00:00:00'):
+        token = create_access_token({'sub': 'test'}, timedelta(minutes=1))
+        assert decode_token(token)['sub'] == 'test'
+        assert decode_token(token)['sub'] == 'test'
+        assert token_cache.hits == hits + 1
+
+    with freeze_time('2024-01-01 00:00:59'):
+        assert decode_token(token)['sub'] == 'test'
+
+    with freeze_time('2024-01-01 00:01:00'), pytest.raises(ExpiredSignatureError):
+        decode_token(token)
@@ -0,0 +1,38 @@
+import pytest
+from pydantic import ValidationError
+
+from curso_fastapi.settings import Settings
+
+
+def make_settings(**values):
+    return Settings(
+        _env_file=None,
+        SECRET_KEY='secret',
+        ALGORITHM='HS256',
+        ACCESS_TOKEN_EXPIRE_MINUTES=30,
+        **values,
+    )
+
+
+@pytest.mark.parametrize(
+    ('url', 'expected'),
+    [
+        ('sqlite:///database.db', 'sqlite+aiosqlite:///database.db'),
+        ('sqlite+aiosqlite:///:memory:', 'sqlite+aiosqlite:///:memory:'),
+        ('postgresql://app:secret@db/app', 'postgresql+asyncpg://app:secret@db/app'),
+        ('postgresql+psycopg2://db/app', 'postgresql+asyncpg://db/app'),
+    ],
+)
+def test_database_urls_use_async_drivers(url, expected):
+    settings = make_settings(
+        DATABASE_URL=url, JOBS_DATABASE_URL=url, DATABASE_REPLICA_URLS=[url]
+    )
+
+    assert settings.DATABASE_URL == expected
+    assert settings.JOBS_DATABASE_URL == expected
+    assert settings.DATABASE_REPLICA_URLS == [expected]
+
+
+def test_unsupported_database_url_is_rejected():
+    with pytest.raises(ValidationError, match='postgresql\\+asyncpg://'):
+        make_settings(DATABASE_URL='mysql://db/app')
@@ -1,5 +1,14 @@
+import csv
+import io
+import json
 from http import HTTPStatus
 
+import pytest
+from sqlalchemy import event, select, update
+
+from curso_fastapi.models import Task
+from curso_fastapi.routers.tasks import tasks_cache
+from curso_fastapi.settings import settings
 from tests.conftest import TaskFactory
 
 
@@ -19,10 +28,11 @@ def test_create_task(client, user, token):
     assert response.status_code == HTTPStatus.CREATED
 
 
-def test_list_tasks_should_return_5_tasks(client, user, token, session):
+@pytest.mark.asyncio
+async def test_list_tasks_should_return_5_tasks(client, user, token, session):
     expected_tasks = 5
-    session.bulk_save_objects(TaskFactory.create_batch(expected_tasks, user_id=user.id))
-    session.commit()
+    session.add_all(TaskFactory.create_batch(expected_tasks, user_id=user.id))
+    await session.commit()
 
     response = client.get('/tasks/', headers={'Authorization': f'Bearer {token}'})
 
@@ -30,11 +40,12 @@ def test_list_tasks_should_return_5_tasks(client, user, token, session):
     assert response.status_code == HTTPStatus.OK
 
 
-def test_list_tasks_should_return_2_tasks(client, user, token, session):
+@pytest.mark.asyncio
+async def test_list_tasks_should_return_2_tasks(client, user, token, session):
     expected_tasks = 5
     limit = 2
-    session.bulk_save_objects(TaskFactory.create_batch(expected_tasks, user_id=user.id))
-    session.commit()
+    session.add_all(TaskFactory.create_batch(expected_tasks, user_id=user.id))
+    await session.commit()
 
     response = client.get(
         '/tasks/?limit=2', headers={'Authorization': f'Bearer {token}'}
@@ -44,12 +55,13 @@ def test_list_tasks_should_return_2_tasks(client, user, token, session):
     assert response.status_code == HTTPStatus.OK
 
 
-def test_list_tasks_should_return_2_tasks_offset_2(client, user, token, session):
+@pytest.mark.asyncio
+async def test_list_tasks_should_return_2_tasks_offset_2(client, user, token, session):
     expected_tasks = 5
     limit = 2
     offset = 2
-    session.bulk_save_objects(TaskFactory.create_batch(expected_tasks, user_id=user.id))
-    session.commit()
+    session.add_all(TaskFactory.create_batch(expected_tasks, user_id=user.id))
+    await session.commit()
 
     response = client.get(
         f'/tasks/?limit={limit}&offset={offset}',
@@ -97,3 +109,581 @@ def test_list_tasks_filter_by_state(client, token, task):
     assert len(response.json()['tasks']) == len_response
     assert response.status_code == HTTPStatus.OK
     assert response.json()['tasks'][0]['state'] == task.state
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_with_cursor_walks_all_pages(client, user, token, session):
+    expected_tasks = 5
+    session.add_all(TaskFactory.create_batch(expected_tasks, user_id=user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    first_page = client.get('/tasks/?limit=2', headers=headers).json()
+    second_page = client.get(
+        f'/tasks/?limit=2&cursor={first_page["next_cursor"]}', headers=headers
+    ).json()
+    last_page = client.get(
+        f'/tasks/?limit=2&cursor={second_page["next_cursor"]}', headers=headers
+    ).json()
+
+    assert [t['id'] for t in first_page['tasks']] == [1, 2]
+    assert [t['id'] for t in second_page['tasks']] == [3, 4]
+    assert [t['id'] for t in last_page['tasks']] == [5]
+    assert last_page['next_cursor'] is None
+
+
+def test_list_tasks_with_empty_or_negative_limit(client, token, task):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.get('/tasks/?limit=0', headers=headers)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'tasks': [], 'next_cursor': None}
+
+    response = client.get('/tasks/?limit=-1', headers=headers)
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_list_tasks_with_invalid_cursor(client, token):
+    response = client.get(
+        '/tasks/?cursor=invalid', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'query', ['', '?state=todo', '?state=todo&cursor=eyJpZCI6IDF9']
+)
+async def test_list_tasks_uses_an_index(client, token, session, query):
+    executed = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, *args):
+        if statement.startswith('SELECT tasks.'):
+            executed.append((statement, parameters))
+
+    engine = session.bind.sync_engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    client.get(f'/tasks/{query}', headers={'Authorization': f'Bearer {token}'})
+    event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    statement, parameters = executed[0]
+    connection = await session.connection()
+    plan = await connection.exec_driver_sql(
+        f'EXPLAIN QUERY PLAN {statement}', parameters
+    )
+    details = [row.detail for row in plan]
+
+    assert any(d.startswith('SEARCH tasks USING') for d in details), details
+    assert not any(d.startswith('SCAN tasks') for d in details), details
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_search_ranks_matches(client, user, token, session):
+    session.add_all([
+        TaskFactory(user_id=user.id, title='Buy milk', description='At the market'),
+        TaskFactory(user_id=user.id, title='Pay bills', description='Electricity'),
+        TaskFactory(user_id=user.id, title='Milk', description='Milk the cow milk'),
+    ])
+    await session.commit()
+
+    response = client.get(
+        '/tasks/?q=milk', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [t['id'] for t in response.json()['tasks']] == [3, 1]
+    assert response.json()['next_cursor'] is None
+
+
+def test_list_tasks_blank_search_lists_everything(client, token, task):
+    response = client.get(
+        '/tasks/?q=%20%20', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [t['id'] for t in response.json()['tasks']] == [task.id]
+
+
+def test_search_follows_task_updates_and_deletes(client, token, task):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.patch(f'/tasks/{task.id}', json={'title': 'Renamed'}, headers=headers)
+
+    assert client.get('/tasks/?q=renamed', headers=headers).json()['tasks']
+
+    client.delete(f'/tasks/{task.id}?permanent=true', headers=headers)
+
+    assert client.get('/tasks/?q=renamed', headers=headers).json()['tasks'] == []
+
+
+def test_create_tasks_bulk(client, token, sql_statements):
+    response = client.post(
+        '/tasks/bulk',
+        json={
+            'tasks': [
+                {'title': 'First', 'description': 'One', 'state': 'todo'},
+                {'title': 'Second', 'description': 'Two', 'state': 'draft'},
+            ]
+        },
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert len([s for s in sql_statements if s.startswith('INSERT INTO tasks')]) == 1
+    assert response.json() == {
+        'results': [
+            {
+                'id': 1,
+                'status': HTTPStatus.CREATED,
+                'task': {
+                    'id': 1,
+                    'title': 'First',
+                    'description': 'One',
+                    'state': 'todo',
+                },
+            },
+            {
+                'id': 2,
+                'status': HTTPStatus.CREATED,
+                'task': {
+                    'id': 2,
+                    'title': 'Second',
+                    'description': 'Two',
+                    'state': 'draft',
+                },
+            },
+        ]
+    }
+
+
+def test_create_tasks_bulk_over_max_batch_size(client, token, monkeypatch):
+    monkeypatch.setattr(settings, 'TASKS_BULK_MAX_SIZE', 1)
+
+    response = client.post(
+        '/tasks/bulk',
+        json={'tasks': [{'title': 'a', 'description': 'b', 'state': 'todo'}] * 2},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+
+@pytest.mark.asyncio
+async def test_update_tasks_bulk(client, token, session, task, another_user):
+    other_task = TaskFactory(user_id=another_user.id)
+    session.add(other_task)
+    await session.commit()
+
+    response = client.patch(
+        '/tasks/bulk',
+        json={
+            'tasks': [
+                {'id': other_task.id, 'title': 'Hijacked'},
+                {'id': 999, 'title': 'Missing'},
+                {'id': task.id, 'title': 'Updated'},
+            ]
+        },
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'results': [
+            {'id': other_task.id, 'status': HTTPStatus.FORBIDDEN, 'task': None},
+            {'id': 999, 'status': HTTPStatus.NOT_FOUND, 'task': None},
+            {'id': task.id, 'status': HTTPStatus.OK, 'task': None},
+        ]
+    }
+    await session.refresh(task)
+    await session.refresh(other_task)
+    assert task.title == 'Updated'
+    assert other_task.title != 'Hijacked'
+
+
+@pytest.mark.asyncio
+async def test_delete_tasks_bulk(client, token, session, user, another_user):
+    own_tasks = TaskFactory.create_batch(2, user_id=user.id)
+    other_task = TaskFactory(user_id=another_user.id)
+    session.add_all([*own_tasks, other_task])
+    await session.commit()
+
+    response = client.request(
+        'DELETE',
+        '/tasks/bulk',
+        json={'ids': [own_tasks[0].id, other_task.id, own_tasks[1].id]},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [r['status'] for r in response.json()['results']] == [
+        HTTPStatus.NO_CONTENT,
+        HTTPStatus.FORBIDDEN,
+        HTTPStatus.NO_CONTENT,
+    ]
+    trashed = await session.scalars(
+        select(Task.id).where(Task.user_id == user.id, Task.state == 'trash')
+    )
+    assert trashed.all() == [own_tasks[0].id, own_tasks[1].id]
+
+    response = client.request(
+        'DELETE',
+        '/tasks/bulk?permanent=true',
+        json={'ids': [own_tasks[0].id]},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    remaining = await session.scalars(select(Task.id))
+    assert remaining.all() == [own_tasks[1].id, other_task.id]
+
+
+def test_bulk_rejects_duplicate_ids(client, token, task):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.request(
+        'DELETE', '/tasks/bulk', json={'ids': [task.id, task.id]}, headers=headers
+    )
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+    response = client.patch(
+        '/tasks/bulk',
+        json={'tasks': [{'id': task.id}, {'id': task.id, 'title': 'Twice'}]},
+        headers=headers,
+    )
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_export_tasks_ndjson(client, user, token, session, another_user):
+    session.add_all([
+        TaskFactory(user_id=user.id, title='First', description='a', state='todo'),
+        TaskFactory(user_id=user.id, title='Second', description='b', state='done'),
+        TaskFactory(user_id=another_user.id),
+    ])
+    await session.commit()
+
+    response = client.get(
+        '/tasks/export?state=todo', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {'id': 1, 'title': 'First', 'description': 'a', 'state': 'todo'}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_export_tasks_csv(client, user, token, session, monkeypatch):
+    monkeypatch.setattr(settings, 'TASKS_EXPORT_BATCH_SIZE', 2)
+    session.add_all(TaskFactory.create_batch(5, user_id=user.id))
+    await session.commit()
+
+    response = client.get(
+        '/tasks/export?format=csv', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/csv')
+    assert rows[0] == ['id', 'title', 'description', 'state']
+    assert [row[0] for row in rows[1:]] == ['1', '2', '3', '4', '5']
+
+
+def test_get_task(client, token, task):
+    response = client.get(
+        f'/tasks/{task.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'id': task.id,
+        'title': task.title,
+        'description': task.description,
+        'state': task.state,
+    }
+    assert response.headers['etag']
+    assert response.headers['cache-control'] == 'private, no-cache'
+
+
+def test_get_task_not_modified(client, token, task):
+    headers = {'Authorization': f'Bearer {token}'}
+    etag = client.get(f'/tasks/{task.id}', headers=headers).headers['etag']
+
+    response = client.get(
+        f'/tasks/{task.id}', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.content == b''
+    assert response.headers['etag'] == etag
+
+    client.patch(f'/tasks/{task.id}', json={'title': 'Renamed'}, headers=headers)
+    response = client.get(
+        f'/tasks/{task.id}', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['etag'] != etag
+
+
+def test_get_task_not_found(client, token):
+    response = client.get('/tasks/10', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Task not found'}
+
+
+@pytest.mark.asyncio
+async def test_get_task_from_another_user(client, token, session, another_user):
+    other_task = TaskFactory(user_id=another_user.id)
+    session.add(other_task)
+    await session.commit()
+
+    response = client.get(
+        f'/tasks/{other_task.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert response.json() == {'detail': 'Not enough permissions'}
+
+
+def test_list_tasks_not_modified(client, token, task):
+    expected_tasks = 2
+    headers = {'Authorization': f'Bearer {token}'}
+    etag = client.get('/tasks/', headers=headers).headers['etag']
+
+    response = client.get('/tasks/', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    response = client.get(
+        '/tasks/?state=done', headers={**headers, 'If-None-Match': etag}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    client.post(
+        '/tasks/',
+        json={'title': 'New', 'description': 'New', 'state': 'todo'},
+        headers=headers,
+    )
+    response = client.get('/tasks/', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()['tasks']) == expected_tasks
+
+
+def test_list_tasks_etag_changes_on_updates_within_a_second(client, token, task):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.patch(f'/tasks/{task.id}', json={'title': 'First'}, headers=headers)
+    etag = client.get('/tasks/', headers=headers).headers['etag']
+
+    client.patch(f'/tasks/{task.id}', json={'title': 'Second'}, headers=headers)
+    response = client.get('/tasks/', headers={**headers, 'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['tasks'][0]['title'] == 'Second'
+
+
+def test_list_tasks_served_from_result_cache(client, token, task, sql_statements):
+    headers = {'Authorization': f'Bearer {token}'}
+    hits = tasks_cache.hits
+
+    first = client.get('/tasks/', headers=headers)
+    sql_statements.clear()
+    second = client.get('/tasks/', headers=headers)
+
+    assert [s for s in sql_statements if 'task' in s] == [
+        s for s in sql_statements if 'FROM task_versions' in s
+    ]
+    assert second.json() == first.json()
+    assert second.headers['etag'] == first.headers['etag']
+    assert tasks_cache.hits == hits + 1
+
+    client.patch(f'/tasks/{task.id}', json={'title': 'Renamed'}, headers=headers)
+    response = client.get('/tasks/', headers=headers)
+
+    assert response.json()['tasks'][0]['title'] == 'Renamed'
+    assert tasks_cache.hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_cache_sees_writes_from_other_workers(
+    client, token, task, session
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    etag = client.get('/tasks/', headers=headers).headers['etag']
+
+    # Another worker's write does not bump this process's cache generation.
+    await session.execute(
+        update(Task).where(Task.id == task.id).values(title='Elsewhere')
+    )
+    await session.commit()
+    response = client.get('/tasks/', headers={**headers, 'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['tasks'][0]['title'] == 'Elsewhere'
+
+
+def test_list_tasks_shared_cache_hits_skip_the_database(
+    client, token, task, sql_statements, monkeypatch
+):
+    monkeypatch.setattr(tasks_cache, 'shared', True)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    first = client.get('/tasks/', headers=headers)
+    sql_statements.clear()
+    second = client.get('/tasks/', headers=headers)
+    not_modified = client.get(
+        '/tasks/', headers={**headers, 'If-None-Match': first.headers['etag']}
+    )
+
+    assert not [s for s in sql_statements if 'task' in s]
+    assert second.json() == first.json()
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_include_total(client, user, token, session):
+    todo_tasks = 5
+    limit = 2
+    session.add_all(TaskFactory.create_batch(todo_tasks, user_id=user.id, state='todo'))
+    session.add_all(TaskFactory.create_batch(2, user_id=user.id, state='done'))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.get(
+        f'/tasks/?state=todo&limit={limit}&include_total=true', headers=headers
+    )
+    assert len(response.json()['tasks']) == limit
+    assert 'total' not in response.json()['tasks'][0]
+    assert response.json()['total'] == todo_tasks
+    assert response.json()['total_exact'] is True
+
+    response = client.get(
+        '/tasks/?state=todo&offset=10&include_total=true', headers=headers
+    )
+    assert response.json()['tasks'] == []
+    assert response.json()['total'] == todo_tasks
+
+    response = client.get('/tasks/?state=todo', headers=headers)
+    assert 'total' not in response.json()
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_total_above_threshold_is_bounded(
+    client, user, token, session, monkeypatch
+):
+    threshold = 2
+    monkeypatch.setattr(settings, 'TASKS_TOTAL_EXACT_THRESHOLD', threshold)
+    session.add_all(TaskFactory.create_batch(5, user_id=user.id))
+    await session.commit()
+
+    response = client.get(
+        '/tasks/?include_total=true', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.json()['total'] == threshold + 1
+    assert response.json()['total_exact'] is False
+
+
+@pytest.fixture(params=[False, True], ids=['group-by', 'counters'])
+def stats_from_counters(request, monkeypatch):
+    monkeypatch.setattr(settings, 'TASKS_STATS_FROM_COUNTERS', request.param)
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('stats_from_counters')
+async def test_task_stats_counts_states(client, user, token, session, another_user):
+    session.add_all(TaskFactory.create_batch(3, user_id=user.id, state='todo'))
+    session.add_all(TaskFactory.create_batch(2, user_id=user.id, state='doing'))
+    session.add_all(TaskFactory.create_batch(4, user_id=another_user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+    task_ids = [
+        task['id'] for task in client.get('/tasks/', headers=headers).json()['tasks']
+    ]
+
+    client.patch(f'/tasks/{task_ids[0]}', json={'state': 'done'}, headers=headers)
+    client.delete(f'/tasks/{task_ids[1]}', headers=headers)
+    client.patch(
+        '/tasks/bulk',
+        json={'tasks': [{'id': task_ids[2], 'state': 'draft'}]},
+        headers=headers,
+    )
+
+    response = client.get('/tasks/stats', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'total': 5,
+        'states': {'draft': 1, 'todo': 0, 'doing': 2, 'done': 1, 'trash': 1},
+        'created_per_day': None,
+        'updated_per_day': None,
+    }
+
+
+def test_task_stats_per_day(client, token, task):
+    response = client.get(
+        '/tasks/stats?days=7', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    day = task.created_at.date().isoformat()
+    assert response.json()['created_per_day'] == [{'day': day, 'count': 1}]
+    assert response.json()['updated_per_day'] == [{'day': day, 'count': 1}]
+
+
+def test_update_task(client, token, task):
+    response = client.patch(
+        f'/tasks/{task.id}',
+        json={'state': 'done'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'id': task.id,
+        'title': task.title,
+        'description': task.description,
+        'state': 'done',
+    }
+
+
+def test_update_task_not_found(client, token):
+    response = client.patch(
+        '/tasks/10',
+        json={'state': 'done'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Task not found'}
+
+
+@pytest.mark.asyncio
+async def test_update_task_from_another_user(client, token, session, another_user):
+    other_task = TaskFactory(user_id=another_user.id)
+    session.add(other_task)
+    await session.commit()
+
+    response = client.patch(
+        f'/tasks/{other_task.id}',
+        json={'state': 'done'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert response.json() == {'detail': 'Not enough permissions'}
+
+
+def test_delete_task(client, token, task):
+    response = client.delete(
+        f'/tasks/{task.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+
+def test_delete_task_not_found(client, token):
+    response = client.delete('/tasks/10', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Task not found'}
@@ -62,7 +62,8 @@ def test_list_users(client, user):
                 'created_at': user.created_at.isoformat(),
                 'updated_at': user.updated_at.isoformat(),
             }
-        ]
+        ],
+        'next_cursor': None,
     }
 
 
@@ -80,6 +81,21 @@ def test_get_user_by_id(client, user):
     }
 
 
+def test_get_user_by_id_not_modified(client, user):
+    etag = client.get(f'/users/{user.id}/').headers['etag']
+
+    response = client.get(f'/users/{user.id}/', headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['etag'] == etag
+
+    response = client.get(
+        f'/users/{user.id}/', headers={'If-None-Match': f'"stale", W/{etag}'}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
 def test_get_user_by_id_not_found(client):
     response = client.get('/users/1/')
     assert response.status_code == HTTPStatus.NOT_FOUND
@@ -137,3 +153,22 @@ def test_delete_user_with_different_user_id(client, another_user, token):
     )
     assert response.status_code == HTTPStatus.FORBIDDEN
     assert response.json() == {'detail': 'Not enough permissions'}
+
+
+def test_list_users_with_cursor(client, user, another_user):
+    first_page = client.get('/users/?limit=1').json()
+    assert [u['id'] for u in first_page['users']] == [user.id]
+
+    response = client.get(f'/users/?limit=1&cursor={first_page["next_cursor"]}')
+
+    assert [u['id'] for u in response.json()['users']] == [another_user.id]
+    assert response.json()['next_cursor'] is None
+
+
+def test_list_users_with_empty_or_negative_limit(client, user):
+    response = client.get('/users/?limit=0')
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'users': [], 'next_cursor': None}
+
+    response = client.get('/users/?limit=-1')
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY